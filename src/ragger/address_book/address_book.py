@@ -30,9 +30,10 @@ their own family and default values in a thin wrapper.
 """
 
 from enum import IntEnum
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from ragger.bip import pack_derivation_path
+from ragger.utils.packing import chunked_APDUs
 from ragger.tlv import (
     TlvSerializable,
     BlockchainFamily,
@@ -135,29 +136,32 @@ class AddressBookCommand(TlvSerializable):
         )
         return payload
 
-    def get_chunks(
+    def iter_chunks(
         self, cla: Optional[int] = None, ins: Optional[int] = None
-    ) -> List[bytes]:
-        """Build the full list of APDUs for this sub-command, ready to _exchange.
+    ) -> Iterator[bytes]:
+        """Lazily build the APDUs for this sub-command, ready to _exchange.
 
         The TLV payload is prefixed with its 2-byte big-endian total length and split over
         ``CHUNK_SIZE`` -byte chunks (a payload fitting in one chunk still carries the prefix).
         P1 selects the sub-command and stays constant.
         P2 flags the first chunk vs continuations.
         """
-        cla = self.CLA if cla is None else cla
-        ins = self.INS if ins is None else ins
-        payload = self.serialize()
-        payload = len(payload).to_bytes(2, "big") + payload
-
-        apdus: List[bytes] = []
-        p2 = self.P2_FIRST_CHUNK
-        while payload:
-            chunk = payload[: self.CHUNK_SIZE]
-            apdus.append(bytes([cla, ins, self.subcommand, p2, len(chunk)]) + chunk)
-            payload = payload[self.CHUNK_SIZE :]
-            p2 = self.P2_NEXT_CHUNK
-        return apdus
+        return chunked_APDUs(
+            self.CLA if cla is None else cla,
+            self.INS if ins is None else ins,
+            self.serialize(),
+            p1=self.subcommand,
+            p2=self.P2_FIRST_CHUNK,
+            p2_next=self.P2_NEXT_CHUNK,
+            max_size=self.CHUNK_SIZE,
+            length_prefix_size=2,
+        )
+
+    def get_chunks(
+        self, cla: Optional[int] = None, ins: Optional[int] = None
+    ) -> List[bytes]:
+        """Build the full list of APDUs for this sub-command, see ``iter_chunks``."""
+        return list(self.iter_chunks(cla, ins))
 
 
 class RegisterIdentity(AddressBookCommand):
@@ -24,6 +24,7 @@ ERROR_MSG = (
 
 try:
     from .speculos import SpeculosBackend
+    from .speculos_async import AsyncSpeculosBackend
 except ImportError as e:
     if "speculos" not in str(e):
         raise e
@@ -35,6 +36,13 @@ except ImportError as e:
             )
         )
 
+    def AsyncSpeculosBackend(*args, **kwargs):  # type: ignore
+        raise ImportError(
+            ERROR_MSG.format(
+                "Speculos", "speculos", "https://github.com/LedgerHQ/speculos/"
+            )
+        )
+
 
 try:
     from .ledgercomm import LedgerCommBackend
@@ -66,6 +74,7 @@ except ImportError as e:
 
 __all__ = [
     "SpeculosBackend",
+    "AsyncSpeculosBackend",
     "LedgerCommBackend",
     "LedgerWalletBackend",
     "BackendInterface",
@@ -19,14 +19,14 @@ from contextlib import contextmanager
 from enum import Enum, auto
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Type, Generator, Any, Iterable, Union
+from typing import Optional, Type, Generator, Any, Iterable, List, Union
 from ledgered.devices import Device
 from warnings import warn
 
 from ragger.firmware import DEPRECATION_MESSAGE, Firmware
 from ragger.logger import get_default_logger, get_apdu_logger, set_apdu_logger_file
 from ragger.utils import pack_APDU, RAPDU, Crop
-from ragger.error import StatusWords
+from ragger.error import ExceptionRAPDU, StatusWords
 
 
 class RaisePolicy(Enum):
@@ -258,6 +258,46 @@ class BackendInterface(ABC):
         """
         raise NotImplementedError
 
+    def exchange_many(
+        self,
+        apdus: Iterable[bytes],
+        stop_on_error: bool = True,
+        tick_timeout: int = 5 * 60 * 10,
+    ) -> List[RAPDU]:
+        """
+        Sends the given APDUs to the backend one after the other, through the
+        fastest path available on this backend, and receives their responses.
+
+        Every part of each APDU (including length) are the caller's
+        responsibility
+
+        :param apdus: The APDU messages
+        :type apdus: Iterable[bytes]
+        :param stop_on_error: If True, the exchanges stop on the first response
+                              whose status is rejected by the raise policy, and
+                              `ExceptionRAPDU` is raised. Else all the APDUs
+                              are sent, and the rejected responses are returned
+                              as the other ones.
+        :type stop_on_error: bool
+        :param tick_timeout: Timeout of each exchange, see :meth:`exchange_raw`
+        :type tick_timeout: int
+
+        :raises ExceptionRAPDU: If `stop_on_error` is True and a status code is
+                                rejected by the raise policy
+
+        :return: The APDU responses, in the same order as the APDUs
+        :rtype: List[RAPDU]
+        """
+        responses = list()
+        for apdu in apdus:
+            try:
+                responses.append(self.exchange_raw(apdu, tick_timeout=tick_timeout))
+            except ExceptionRAPDU as error:
+                if stop_on_error:
+                    raise
+                responses.append(RAPDU(error.status, error.data))
+        return responses
+
     @contextmanager
     def exchange_async(
         self, cla: int, ins: int, p1: int = 0, p2: int = 0, data: bytes = b""
@@ -449,6 +489,126 @@ class BackendInterface(ABC):
         """
         raise NotImplementedError
 
+    def compare_screenshot_with_snapshot(
+        self,
+        screenshot: bytes,
+        golden_snap_path: Path,
+        crop: Optional[Crop] = None,
+        golden_run: bool = False,
+    ) -> bool:
+        """
+        Compare a screen previously captured with :meth:`get_screenshot` with
+        the provided snapshot.
+
+        :param screenshot: The captured screen, as a PNG image
+        :type screenshot: bytes
+        :param golden_snap_path: The path to the snap to compare the screen with
+        :type golden_snap_path: Path
+        :param crop: Optional crop options to use for the comparison
+        :type crop: Crop
+        :param golden_run: Optional option to save the screen as golden
+                           instead of comparing it.
+        :type golden_run: bool
+
+        :return: True if matches else False
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def get_screenshot(self) -> Optional[bytes]:
+        """
+        Get the current device screen, as an encoded PNG image.
+
+        Backends which cannot capture the screen (such as backends connecting
+        to physical devices) return `None`.
+
+        :return: The current screen, as a PNG image
+        :rtype: Optional[bytes]
+        """
+        return None
+
+    def capture_reference(self) -> Any:
+        """
+        Capture the current device screen, to later check whether the screen
+        changed since, with :meth:`screen_differs_from`.
+
+        The reference is kept in memory and its content is specific to each
+        backend. Backends which cannot capture the screen (such as backends
+        connecting to physical devices) return `None`.
+
+        :return: An opaque reference to the current screen
+        :rtype: Any
+        """
+        return None
+
+    def screen_differs_from(self, reference: Any, crop: Optional[Crop] = None) -> bool:
+        """
+        Compare the current device screen with a reference returned by
+        :meth:`capture_reference`.
+
+        Backends which cannot capture the screen always consider it different,
+        so that instructions waiting for a screen change do not get stuck.
+
+        :param reference: The reference to compare the screen with
+        :type reference: Any
+        :param crop: Optional crop options to use for the comparison
+        :type crop: Crop
+
+        :return: True if the screen differs from the reference, else False
+        :rtype: bool
+        """
+        return True
+
+    def last_screen_differs_from(self, reference: Any, crop: Optional[Crop] = None) -> bool:
+        """
+        Compare the screen detected by the last :meth:`wait_for_screen_change`
+        (or taken as reference since) with a reference returned by
+        :meth:`capture_reference`, without capturing the screen again.
+
+        Backends which do not keep the last detected screen compare the current
+        one, as :meth:`screen_differs_from` does.
+
+        :param reference: The reference to compare the screen with
+        :type reference: Any
+        :param crop: Optional crop options to use for the comparison
+        :type crop: Crop
+
+        :return: True if the screen differs from the reference, else False
+        :rtype: bool
+        """
+        return self.screen_differs_from(reference, crop)
+
+    def last_change_within(self, crop: Optional[Crop] = None) -> bool:
+        """
+        Tell whether the last screen change detected by
+        :meth:`wait_for_screen_change` updated pixels kept by a crop. A change
+        which only updated cropped out pixels (a progress bar for instance)
+        cannot make the screen differ from a reference within the crop.
+
+        Backends which do not know the changed region always consider the change
+        to be within the crop.
+
+        :param crop: The crop to check the change against
+        :type crop: Crop
+
+        :return: True if the change updated pixels kept by the crop, else False
+        :rtype: bool
+        """
+        return True
+
+    def last_screen_fingerprint(self) -> Optional[bytes]:
+        """
+        Get a fingerprint of the screen detected by the last
+        :meth:`wait_for_screen_change` (or taken as reference since), without
+        capturing the screen again. Identical screens have the same fingerprint.
+
+        Backends which cannot capture the screen return `None`.
+
+        :return: The fingerprint of the last detected screen
+        :rtype: Optional[bytes]
+        """
+        return None
+
     @abstractmethod
     def wait_for_screen_change(self, timeout: float = 10.0) -> None:
         """
@@ -621,3 +781,17 @@ class BackendInterface(ABC):
         :rtype: NoneType
         """
         pass
+
+    def send_ticks(self, number: int) -> None:
+        """
+        Request the backend to increase time by `number` steps, without looking
+        at the screen in between.
+
+        :param number: The number of steps
+        :type number: int
+
+        :return: None
+        :rtype: NoneType
+        """
+        for _ in range(number):
+            self.send_tick()
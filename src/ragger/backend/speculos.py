@@ -16,45 +16,156 @@ limitations under the License.
 
 import select
 import socket
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from contextlib import contextmanager
 from copy import deepcopy
 from io import BytesIO
 from mnemonic import Mnemonic
 from os import urandom
 from pathlib import Path
-from PIL import Image
-from typing import Optional, Generator, List, Type, TypeVar
+from typing import Dict, Optional, Generator, Iterable, List, Tuple, Type, TypeVar
 from time import time, sleep
 from re import match
+from threading import Event, Thread
+from weakref import finalize
 
-from ledgered import binary
-from ledgered.devices import Device
+# Imported first: without the `speculos` extra, the error raised must be about
+# Speculos for `ragger.backend` to import anyway (see its `__init__`)
 from speculos.client import (
     SpeculosClient,
-    screenshot_equal,
     ApduResponse,
     ApduException,
 )
 from speculos.mcu.seproxyhal import TICKER_DELAY
 
+import numpy as np
+from ledgered import binary
+from ledgered.devices import Device
+from requests.adapters import HTTPAdapter
+
 from ragger.error import StatusWords, ExceptionRAPDU
 from ragger.logger import get_default_logger
 from ragger.utils import RAPDU, Crop
-from .interface import BackendInterface, GraphicalLibrary
+from ragger.utils.images import (
+    GOLDEN_CACHE,
+    Region,
+    changed_region,
+    crop_image,
+    decode_image,
+    image_digest,
+    images_equal,
+)
+from ragger.utils.ports import release_ports, reserve_port
+from ragger.utils.snapshot_blobs import write_golden
+from ragger.utils.snapshots import get_manifest
+from .interface import BackendInterface, GraphicalLibrary, RaisePolicy
 
 STARTING_RANGE = 7000
 T = TypeVar("T", bound="SpeculosBackend")
 
 
-def _is_port_in_use(port: int) -> bool:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex(("localhost", port)) == 0
+class _ScreenEventListener(Thread):
+    """
+    Background reader of the Speculos event stream, flagging every display
+    update notified by the emulator.
+    """
 
+    def __init__(self, client: SpeculosClient):
+        super().__init__(name="speculos-screen-events", daemon=True)
+        self._client = client
+        self._stopped = Event()
+        self.screen_updated = Event()
 
-def _get_unused_port_from(starting_port: int) -> int:
-    while _is_port_in_use(starting_port):
-        starting_port += 1
-    return starting_port
+    def run(self) -> None:
+        try:
+            # Checked before every read, so that a listener being stopped never
+            # reads from the stream of a relaunched instance
+            while not self._stopped.is_set():
+                self._client.get_next_event()
+                self.screen_updated.set()
+        except Exception as error:
+            # The stream is closed when the Speculos instance stops
+            get_default_logger().debug("Speculos event stream closed (%s)", error)
+
+    def stop(self) -> None:
+        """
+        Flags the listener as stopped. It exits as soon as its pending read
+        returns, which happens when the event stream is closed.
+        """
+        self._stopped.set()
+
+
+class _RawApduSocket:
+    """
+    Persistent connection to the Speculos raw APDU port.
+
+    APDUs are sent as binary frames (4-byte big-endian length, then the APDU),
+    and responses are received as (4-byte big-endian length of the data, then
+    the data and the 2-byte status), without any HTTP or JSON encoding.
+    """
+
+    def __init__(self, port: int):
+        self._port = port
+        self._socket: Optional[socket.socket] = None
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _connect(self) -> socket.socket:
+        if self._socket is None:
+            self._socket = socket.create_connection(("127.0.0.1", self._port))
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self._socket
+
+    def _drain(self, sock: socket.socket) -> None:
+        # Speculos also forwards the responses to the APDUs sent through its
+        # HTTP API to this socket: discard them before a new exchange
+        while select.select([sock], [], [], 0)[0]:
+            if not sock.recv(4096):
+                raise ConnectionError("APDU connection closed by Speculos")
+
+    def _receive_exactly(self, sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("APDU connection closed by Speculos")
+            data += chunk
+        return bytes(data)
+
+    def exchange(self, data: bytes, timeout: Optional[float] = None) -> RAPDU:
+        """
+        :param timeout: Maximum time (in seconds) to wait for the response
+
+        :raises TimeoutError: If no response is received in time
+        """
+        sock = self._connect()
+        try:
+            self._drain(sock)
+            sock.settimeout(timeout)
+            sock.sendall(len(data).to_bytes(4, "big") + data)
+            size = int.from_bytes(self._receive_exactly(sock, 4), "big")
+            response = self._receive_exactly(sock, size + 2)
+        except socket.timeout:
+            # A late response would desynchronize the connection
+            self.close()
+            raise TimeoutError() from None
+        except Exception:
+            self.close()
+            raise
+        return RAPDU(int.from_bytes(response[-2:], "big"), response[:-2])
+
+
+def apply_raise_policy(backend: BackendInterface, rapdu: RAPDU) -> RAPDU:
+    backend.apdu_logger.info("<= %s%4x", rapdu.data.hex(), rapdu.status)
+
+    if backend.is_raise_required(rapdu):
+        raise ExceptionRAPDU(rapdu.status, rapdu.data)
+    else:
+        return rapdu
 
 
 def raise_policy_enforcer(function):
@@ -66,12 +177,7 @@ def raise_policy_enforcer(function):
         except ApduException as error:
             rapdu = RAPDU(error.sw, error.data)
 
-        self.apdu_logger.info("<= %s%4x", rapdu.data.hex(), rapdu.status)
-
-        if self.is_raise_required(rapdu):
-            raise ExceptionRAPDU(rapdu.status, rapdu.data)
-        else:
-            return rapdu
+        return apply_raise_policy(self, rapdu)
 
     return decoration
 
@@ -81,6 +187,17 @@ class SpeculosBackend(BackendInterface):
     _ARGS_KEY = "args"
     _ARGS_API_PORT_KEY = "--api-port"
     _ARGS_APDU_PORT_KEY = "--apdu-port"
+    # Consecutive ticks notifying a display update after which the screen is compared
+    # anyway, so that a screen updated on every tick (spinner...) is still detected
+    _SCREEN_EVENT_MAX_SKIPS = 3
+    # Delay given to a stopped event listener to exit once its stream is closed
+    _SCREEN_EVENT_JOIN_TIMEOUT = 1.0
+    # Upper bound of the delay between two readiness checks at boot (the lower
+    # bound being the `boot_poll_floor` argument)
+    _BOOT_POLL_CEILING = 0.1
+    # Maximum time (in seconds) for the application to display something, once
+    # the Speculos process is up
+    _BOOT_DISPLAY_TIMEOUT = 20.0
 
     def __init__(
         self,
@@ -88,14 +205,48 @@ class SpeculosBackend(BackendInterface):
         device: Device,
         log_apdu_file: Optional[Path] = None,
         coverage_trace_dir: Optional[Path] = None,
+        use_screen_events: bool = False,
+        boot_poll_floor: float = 0.005,
+        max_tick_batch: int = 1,
+        use_raw_apdu: bool = False,
+        http_pool_size: int = 8,
+        screenshot_workers: int = 0,
+        golden_manifests: bool = False,
         **kwargs,
     ):
         super().__init__(device=device, log_apdu_file=log_apdu_file)
+        # The event stream holds a connection for as long as it is open: a single
+        # connection would leave none to the other API calls
+        if http_pool_size < 2:
+            raise ValueError(f"http_pool_size must be at least 2, got {http_pool_size}")
+        # Maximum number of ticks sent between two screenshots while waiting for
+        # a screen change. Above 1, long waits (spinners, timed screens) take
+        # fewer screenshots, but a screen displayed for less than a batch of
+        # ticks can be missed.
+        self._max_tick_batch = max(1, max_tick_batch)
+        # When above 0, screenshots taken while waiting for a screen change are
+        # decoded and compared by as many worker threads, while the emulator keeps
+        # being ticked. At most that many screenshots are pending at once, which
+        # bounds how far the emulator can be ticked past the change.
+        self._screenshot_workers = screenshot_workers
+        self._screenshot_pool: Optional[ThreadPoolExecutor] = None
+        # When enabled, golden runs record the digests of the goldens they write
+        # into the manifest of their directory (see ragger.utils.snapshots), and
+        # comparisons use these digests. Manifests are left alone otherwise.
+        self._golden_manifests = golden_manifests
+        # When enabled, screen changes are detected from the Speculos event
+        # stream, and screenshots are only taken once the display settled.
+        self._use_screen_events = use_screen_events
+        self._screen_events: Optional[_ScreenEventListener] = None
         # ELF and trace directory used for firmware C coverage (see
         # ragger.utils.coverage). Coverage is off unless a trace dir is given.
         self._application = Path(application)
         self._coverage_trace_dir = coverage_trace_dir
         self._coverage_device_name = device.name
+        # Ports allocated (and leased, see ragger.utils.ports) for this instance,
+        # released when it stops or is garbage collected
+        self._leased_ports: List[int] = list()
+        self._release_ports = finalize(self, release_ports, self._leased_ports)
         # crafting Speculos arguments
         args = ["--model", device.name]
         speculos_args: List = kwargs.get(self._ARGS_KEY, list())
@@ -107,14 +258,16 @@ class SpeculosBackend(BackendInterface):
             index = speculos_args.index(self._ARGS_API_PORT_KEY)
             self._api_port = int(speculos_args[index + 1])
         else:
-            self._api_port = _get_unused_port_from(self._DEFAULT_API_PORT)
+            self._api_port = reserve_port(self._DEFAULT_API_PORT)
+            self._leased_ports.append(self._api_port)
             args.extend([self._ARGS_API_PORT_KEY, str(self._api_port)])
         # Inferring the APDU port
         if self._ARGS_APDU_PORT_KEY in speculos_args:
             index = speculos_args.index(self._ARGS_APDU_PORT_KEY)
             self._apdu_port = int(speculos_args[index + 1])
         else:
-            self._apdu_port = _get_unused_port_from(self._api_port + 1)
+            self._apdu_port = reserve_port(self._api_port + 1)
+            self._leased_ports.append(self._apdu_port)
             args.extend([self._ARGS_APDU_PORT_KEY, str(self._apdu_port)])
         speculos_args.extend(args)
         kwargs[self._ARGS_KEY] = speculos_args
@@ -135,12 +288,44 @@ class SpeculosBackend(BackendInterface):
         self._client: SpeculosClient = SpeculosClient(
             app=str(application), api_url=self.url, **kwargs
         )
+        # Every API call reuses a kept-alive connection (urllib3 disables Nagle on them).
+        # `http_pool_size` connections are kept. Above that many requests in flight
+        # (the event stream and a pending async APDU each hold one), extra connections
+        # are opened then closed rather than waited for: requests has no pool timeout,
+        # and a caller waiting on a connection held by a blocked APDU would never wake.
+        self._client.session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=http_pool_size, pool_block=False),
+        )
+        # When enabled, `exchange_raw` talks to the raw APDU port directly
+        # instead of going through the HTTP API
+        self._raw_apdu: Optional[_RawApduSocket] = (
+            _RawApduSocket(self._apdu_port) if use_raw_apdu else None
+        )
         self._pending: Optional[ApduResponse] = None
         self._pending_async_response: Optional[ApduResponse] = None
         self._last_screenshot: Optional[BytesIO] = None
         self._home_screenshot: Optional[BytesIO] = None
+        # Fingerprints of the decoded pixels of the screenshots above, so that
+        # screen equality checks are digest comparisons
+        self._last_screenshot_digest: Optional[bytes] = None
+        self._home_screenshot_digest: Optional[bytes] = None
+        # Decoded pixels of the last screenshot, and of the one it replaced when a
+        # screen change was detected, and the region which changed between them,
+        # only computed when asked for
+        self._last_screenshot_pixels: Optional[np.ndarray] = None
+        self._previous_screenshot_pixels: Optional[np.ndarray] = None
+        self._last_changed_region: Optional[Region] = None
         self._ticker_paused_count = 0
         self._apdu_timeout = 0.3
+        # Duration (in seconds) of the last start, until the home screen is reached,
+        # and of each of its phases:
+        # - "api": Speculos process spawned, its API reachable and its event stream open
+        # - "display": application displaying its first text
+        # - "screenshot": home screen reference fetched
+        self.boot_time: Optional[float] = None
+        self.boot_timings: Dict[str, float] = dict()
+        self._boot_poll_floor = boot_poll_floor
 
     @property
     def url(self) -> str:
@@ -197,6 +382,77 @@ class SpeculosBackend(BackendInterface):
     def send_tick(self) -> None:
         self._client.ticker_ctl("single-step")
 
+    def _get_screenshot(self) -> Tuple[BytesIO, np.ndarray, bytes]:
+        """
+        Fetches the current screen, along with its pixels and their fingerprint.
+        """
+        screenshot = BytesIO(self._client.get_screenshot())
+        return (screenshot, *self._decode_screenshot(screenshot))
+
+    @staticmethod
+    def _decode_screenshot(screenshot: BytesIO) -> Tuple[np.ndarray, bytes]:
+        pixels = decode_image(screenshot)
+        return pixels, image_digest(pixels)
+
+    def _set_last_screenshot(
+        self, screenshot: BytesIO, pixels: np.ndarray, digest: bytes, is_change: bool = True
+    ) -> None:
+        """
+        Makes a screen the reference for the next screen changes. Unless it is a
+        new reference rather than a change, the replaced screen is kept to give
+        the changed region on demand.
+        """
+        self._previous_screenshot_pixels = self._last_screenshot_pixels if is_change else None
+        self._last_changed_region = None
+        self._last_screenshot = screenshot
+        self._last_screenshot_pixels = pixels
+        self._last_screenshot_digest = digest
+
+    def _take_reference_screenshot(self) -> None:
+        """
+        Makes the current screen the reference for the next screen changes,
+        without recording it as a change.
+        """
+        screenshot, pixels, digest = self._get_screenshot()
+        self._set_last_screenshot(screenshot, pixels, digest, is_change=False)
+
+    @property
+    def last_changed_region(self) -> Optional[Region]:
+        """
+        The region of the display which changed at the last screen change
+        detected by :meth:`wait_for_screen_change`, as a `(left, upper, right,
+        lower)` box. `None` if no change was detected since the last reference
+        screen was taken.
+
+        This allows to check whether a change only concerns some area of the
+        screen (a progress bar for instance) without comparing whole screens.
+
+        :return: The bounding box of the changed pixels
+        :rtype: Optional[Region]
+        """
+        if self._last_changed_region is None and self._previous_screenshot_pixels is not None:
+            assert self._last_screenshot_pixels is not None
+            self._last_changed_region = changed_region(
+                self._previous_screenshot_pixels, self._last_screenshot_pixels
+            )
+        return self._last_changed_region
+
+    def last_change_within(self, crop: Optional[Crop] = None) -> bool:
+        region = self.last_changed_region
+        if region is None or self._last_screenshot_pixels is None:
+            # No change known: it may be anywhere
+            return True
+        if crop is None:
+            return True
+        height, width = self._last_screenshot_pixels.shape[:2]
+        left, upper, right, lower = region
+        return (
+            left < width - crop.right
+            and right > crop.left
+            and upper < height - crop.lower
+            and lower > crop.upper
+        )
+
     def __enter__(self) -> "SpeculosBackend":
         self.logger.info(f"Starting {self.__class__.__name__} stream")
         # Enable QEMU tracing before Speculos spawns it: the env vars are
@@ -207,27 +463,150 @@ class SpeculosBackend(BackendInterface):
             coverage.enable(
                 self._coverage_device_name, self._application, self._coverage_trace_dir
             )
-        self._client.__enter__()
-
-        # Wait until some text is displayed on the screen.
-        start = time()
-        while not self._retrieve_client_screen_content()["events"]:
-            # Send a ticker event and let the app process it
-            sleep(0.1)
-            if time() - start > 20.0:
-                raise TimeoutError(
-                    "Timeout waiting for screen content upon Ragger Speculos Instance start"
-                )
-
-        self._last_screenshot = BytesIO(self._client.get_screenshot())
+        self._start()
+        self.logger.info(
+            "Speculos instance booted in %.2fs (%s)",
+            self.boot_time,
+            ", ".join(
+                f"{phase}: {duration:.3f}s" for phase, duration in self.boot_timings.items()
+            ),
+        )
 
         # Save current screenshot as _home_screenshot.
         self._home_screenshot = self._last_screenshot
+        self._home_screenshot_digest = self._last_screenshot_digest
 
         return self
 
     def __exit__(self, *args):
+        if self._raw_apdu is not None:
+            self._raw_apdu.close()
+        if self._screenshot_pool is not None:
+            self._screenshot_pool.shutdown()
+            self._screenshot_pool = None
+        self._stop_screen_events()
         self._client.__exit__(*args)
+        self._join_screen_events()
+        self._release_ports()
+
+    def _stop_screen_events(self) -> None:
+        if self._screen_events is not None:
+            self._screen_events.stop()
+
+    def _join_screen_events(self) -> None:
+        # To be called once the client stopped, which closes the event stream
+        if self._screen_events is not None:
+            self._screen_events.join(self._SCREEN_EVENT_JOIN_TIMEOUT)
+            if self._screen_events.is_alive():
+                self.logger.warning("Speculos event listener did not stop in time")
+            self._screen_events = None
+
+    def _start(self) -> None:
+        """
+        Starts the Speculos instance and waits for the application to be ready.
+        """
+        self.boot_timings = dict()
+        start = last = time()
+
+        def record(phase: str) -> None:
+            nonlocal last
+            now = time()
+            self.boot_timings[phase] = now - last
+            last = now
+
+        self._client.__enter__()
+        record("api")
+        if self._use_screen_events:
+            self._screen_events = _ScreenEventListener(self._client)
+            self._screen_events.start()
+
+        # Wait until some text is displayed on the screen, polling with an
+        # exponential backoff (woken up early by display events if the event
+        # stream is listened to).
+        delay = self._boot_poll_floor
+        # The launch itself (QEMU startup) does not count against the display timeout
+        display_deadline = time() + self._BOOT_DISPLAY_TIMEOUT
+        while not self._retrieve_client_screen_content()["events"]:
+            if time() > display_deadline:
+                raise TimeoutError(
+                    "Timeout waiting for screen content upon Ragger Speculos Instance start"
+                )
+            if self._screen_events is not None:
+                self._screen_events.screen_updated.wait(delay)
+                self._screen_events.screen_updated.clear()
+            else:
+                sleep(delay)
+            delay = min(2 * delay, self._BOOT_POLL_CEILING)
+        record("display")
+
+        self._take_reference_screenshot()
+        record("screenshot")
+        self.boot_time = time() - start
+
+    def _reset_state(self) -> None:
+        self.raise_policy = RaisePolicy.RAISE_ALL_BUT_0x9000
+        self.whitelisted_status = ()
+        self._pending = None
+        self._pending_async_response = None
+        self._last_async_response = None
+
+    def reset(self, timeout: float = 5.0) -> None:
+        """
+        Puts a started instance back into a state where it can be handed to
+        another test: the backend-side state (raise policy, pending exchanges,
+        paused ticker) is reset, then the application is expected to get back
+        to its home screen.
+
+        The emulated device itself is not restarted.
+
+        :param timeout: Maximum time to wait for the home screen
+        :type timeout: float
+
+        :raises TimeoutError: If the application does not get back to its home
+                              screen, in which case the instance should not be
+                              reused.
+        """
+        self._reset_state()
+        if self._ticker_paused_count:
+            self._ticker_paused_count = 0
+            self._client.ticker_ctl("resume")
+        # The last reference may be stale: start from the actual screen
+        self._take_reference_screenshot()
+        self.wait_for_home_screen(timeout)
+
+    def restore_checkpoint(self) -> None:
+        """
+        Brings a started instance back to the state it was in right after its
+        first boot reached the home screen: RAM, NVRAM and display.
+
+        Speculos has no way to snapshot a running emulator, so the checkpoint
+        is the launch itself: the emulator is relaunched in place, with the same
+        arguments (seed, RNG, ports...), which restores the exact same state
+        as the NVRAM is not persisted between launches. This spares everything
+        else a new backend costs (ELF parsing, port allocation, fixtures setup).
+
+        The backend-side state (raise policy, pending exchanges, paused ticker)
+        is reset as well.
+
+        :raises TimeoutError: If the relaunched application does not display
+                              anything
+        """
+        self._reset_state()
+        self._ticker_paused_count = 0
+        if self._raw_apdu is not None:
+            self._raw_apdu.close()
+        # The listener of the stopped instance must be gone before the new one
+        # opens its event stream
+        self._stop_screen_events()
+        self._client.stop()
+        self._join_screen_events()
+        self._start()
+        if self._last_screenshot_digest != self._home_screenshot_digest:
+            self.logger.warning(
+                "Home screen differs from the checkpoint one after restoration"
+            )
+            self._home_screenshot = self._last_screenshot
+            self._home_screenshot_digest = self._last_screenshot_digest
 
     def handle_usb_reset(self) -> None:
         pass
@@ -245,11 +624,33 @@ class SpeculosBackend(BackendInterface):
     @raise_policy_enforcer
     def exchange_raw(self, data: bytes = b"", tick_timeout: int = 5 * 60 * 10) -> RAPDU:
         self.apdu_logger.info("=> %s", data.hex())
+        if self._raw_apdu is not None:
+            # Speculos counts the timeout in ticks, the socket in seconds. As for
+            # Speculos, no (or a negative) tick timeout means waiting forever
+            timeout = tick_timeout * TICKER_DELAY if tick_timeout > 0 else None
+            return self._raw_apdu.exchange(data, timeout=timeout)
         return RAPDU(
             StatusWords.SWO_SUCCESS,
             self._client._apdu_exchange(data, tick_timeout=tick_timeout),
         )
 
+    def exchange_many(
+        self,
+        apdus: Iterable[bytes],
+        stop_on_error: bool = True,
+        tick_timeout: int = 5 * 60 * 10,
+    ) -> List[RAPDU]:
+        if self._raw_apdu is not None:
+            return super().exchange_many(apdus, stop_on_error, tick_timeout)
+        # The APDUs go through a raw APDU connection opened for the occasion,
+        # rather than an HTTP request each
+        self._raw_apdu = _RawApduSocket(self._apdu_port)
+        try:
+            return super().exchange_many(apdus, stop_on_error, tick_timeout)
+        finally:
+            self._raw_apdu.close()
+            self._raw_apdu = None
+
     @raise_policy_enforcer
     def _get_last_async_response(self, response) -> RAPDU:
         return RAPDU(StatusWords.SWO_SUCCESS, response.receive())
@@ -291,8 +692,9 @@ class SpeculosBackend(BackendInterface):
 
     def _save_screen_snapshot(self, snap: BytesIO, path: Path) -> None:
         self.logger.info(f"Saving screenshot to image '{path}'")
-        img = Image.open(snap)
-        img.save(path)
+        # Speculos already serves PNG images: they are written as is, rather than
+        # decoded and encoded again
+        Path(path).write_bytes(snap.getbuffer())
 
     def compare_screen_with_snapshot(
         self,
@@ -308,21 +710,62 @@ class SpeculosBackend(BackendInterface):
         if tmp_snap_path:
             self._save_screen_snapshot(snap, tmp_snap_path)
 
+        return self.compare_screenshot_with_snapshot(
+            snap.getvalue(), golden_snap_path, crop, golden_run
+        )
+
+    def compare_screenshot_with_snapshot(
+        self,
+        screenshot: bytes,
+        golden_snap_path: Path,
+        crop: Optional[Crop] = None,
+        golden_run: bool = False,
+    ) -> bool:
+        snap = BytesIO(screenshot)
+        pixels = decode_image(snap)
+        golden_snap_path = Path(golden_snap_path)
+        manifest = get_manifest(golden_snap_path.parent) if self._golden_manifests else None
+
         # Allow to generate golden snapshots
         if golden_run:
-            self._save_screen_snapshot(snap, golden_snap_path)
-
-        if crop is not None:
-            return screenshot_equal(
-                f"{golden_snap_path}",
-                snap,
-                left=crop.left,
-                upper=crop.upper,
-                right=crop.right,
-                lower=crop.lower,
-            )
-        else:
-            return screenshot_equal(f"{golden_snap_path}", snap)
+            self.logger.info(f"Saving screenshot to image '{golden_snap_path}'")
+            write_golden(golden_snap_path, snap.getvalue())
+            if manifest is not None:
+                manifest.record(golden_snap_path.name, pixels, crop)
+
+        # Known golden digests spare reading and decoding the golden, unless they
+        # differ from the screen one
+        if manifest is not None:
+            expected = manifest.digest(golden_snap_path.name, crop)
+            if expected is not None and expected == image_digest(crop_image(pixels, crop)):
+                return True
+
+        # Goldens are decoded once, then served (already cropped) from the cache
+        if crop is None:
+            return GOLDEN_CACHE.get_digest(golden_snap_path) == image_digest(pixels)
+        golden = GOLDEN_CACHE.get(golden_snap_path, crop)
+        return images_equal(golden, crop_image(pixels, crop))
+
+    def get_screenshot(self) -> bytes:
+        return self._client.get_screenshot()
+
+    def capture_reference(self) -> np.ndarray:
+        return self._get_screenshot()[1]
+
+    def screen_differs_from(self, reference: np.ndarray, crop: Optional[Crop] = None) -> bool:
+        pixels = self._get_screenshot()[1]
+        return not images_equal(crop_image(reference, crop), crop_image(pixels, crop))
+
+    def last_screen_differs_from(
+        self, reference: np.ndarray, crop: Optional[Crop] = None
+    ) -> bool:
+        pixels = self._last_screenshot_pixels
+        if pixels is None:
+            return self.screen_differs_from(reference, crop)
+        return not images_equal(crop_image(reference, crop), crop_image(pixels, crop))
+
+    def last_screen_fingerprint(self) -> Optional[bytes]:
+        return self._last_screenshot_digest
 
     def get_current_screen_content(self) -> dict:
         return self._retrieve_client_screen_content()
@@ -346,7 +789,7 @@ class SpeculosBackend(BackendInterface):
         self.pause_ticker()
         # Save current snapshot in case its content already matches and we never
         # call wait_for_screen_change
-        self._last_screenshot = BytesIO(self._client.get_screenshot())
+        self._take_reference_screenshot()
         while True:
             if self.compare_screen_with_text(text) == should_be_on_screen:
                 self.resume_ticker()
@@ -360,35 +803,118 @@ class SpeculosBackend(BackendInterface):
     def wait_for_text_not_on_screen(self, text: str, timeout: float = 10.0) -> None:
         self._wait_for_text_on_screen_or_not(False, text, timeout)
 
-    def wait_for_screen_change(self, timeout: float = 10.0) -> None:
-        screenshot = BytesIO(self._client.get_screenshot())
-        for _ in range(int(timeout / TICKER_DELAY)):
-            if not screenshot_equal(screenshot, self._last_screenshot):
+    def _wait_for_screen_change_from_events(self, timeout: float) -> None:
+        assert self._screen_events is not None
+        screen_updated = self._screen_events.screen_updated
+        screenshot, pixels, digest = self._get_screenshot()
+        if digest == self._last_screenshot_digest:
+            skipped = 0
+            for _ in range(int(timeout / TICKER_DELAY)):
+                self._check_async_error()
+                screen_updated.clear()
+                self.send_tick()
+                if screen_updated.is_set() and skipped < self._SCREEN_EVENT_MAX_SKIPS:
+                    # The display is still being updated, let it settle
+                    skipped += 1
+                    continue
+                skipped = 0
+                # Updates without any text event (icons, spinners...) are not
+                # notified by the event stream: the screen is compared after every
+                # tick without event, so that no screen is missed
+                screenshot, pixels, digest = self._get_screenshot()
+                if digest != self._last_screenshot_digest:
+                    break
+            else:
+                raise TimeoutError("Timeout waiting for screen change")
+
+        # Update self._last_screenshot to use it as reference for next calls
+        self._set_last_screenshot(screenshot, pixels, digest)
+
+    def _wait_for_screen_change_pipelined(self, timeout: float) -> None:
+        if self._screenshot_pool is None:
+            self._screenshot_pool = ThreadPoolExecutor(
+                max_workers=self._screenshot_workers,
+                thread_name_prefix="ragger-screenshots",
+            )
+        pool = self._screenshot_pool
+
+        def fetch() -> Tuple[BytesIO, "Future[Tuple[np.ndarray, bytes]]"]:
+            screenshot = BytesIO(self._client.get_screenshot())
+            return screenshot, pool.submit(self._decode_screenshot, screenshot)
+
+        max_ticks = int(timeout / TICKER_DELAY)
+        ticks = 0
+        batch = 1
+        # Screenshots being decoded, oldest first. They are checked in order, so
+        # that the first changed screen is the one kept as reference.
+        pending = deque([fetch()])
+        while True:
+            # Check the decoded screenshots, and wait for the oldest one when no
+            # more screenshot can be queued (or no more tick can be sent)
+            while pending and (
+                pending[0][1].done()
+                or len(pending) >= self._screenshot_workers
+                or ticks >= max_ticks
+            ):
+                screenshot, decoded = pending.popleft()
+                pixels, digest = decoded.result()
+                if digest != self._last_screenshot_digest:
+                    for _, other in pending:
+                        other.cancel()
+                    # Update self._last_screenshot to use it as reference for next calls
+                    self._set_last_screenshot(screenshot, pixels, digest)
+                    return
+            if ticks >= max_ticks:
                 break
 
+            self._check_async_error()
+            step = min(batch, max_ticks - ticks)
+            self.send_ticks(step)
+            ticks += step
+            batch = min(2 * batch, self._max_tick_batch)
+            pending.append(fetch())
+        raise TimeoutError("Timeout waiting for screen change")
+
+    def wait_for_screen_change(self, timeout: float = 10.0) -> None:
+        if self._screen_events is not None:
+            return self._wait_for_screen_change_from_events(timeout)
+        if self._screenshot_workers > 0:
+            return self._wait_for_screen_change_pipelined(timeout)
+
+        max_ticks = int(timeout / TICKER_DELAY)
+        ticks = 0
+        # Number of ticks sent before the next screenshot: it doubles (up to
+        # `max_tick_batch`) as long as the screen does not change.
+        batch = 1
+        screenshot, pixels, digest = self._get_screenshot()
+        while digest == self._last_screenshot_digest:
+            if ticks >= max_ticks:
+                raise TimeoutError("Timeout waiting for screen change")
+
             # Check for async APDU errors before sending a tick. This ensures that if the
             # application has already refused the APDU (e.g., due to an error), we detect and raise
             # the error immediately instead of waiting for a screen change that will never occur.
             # This makes navigation robust and prevents hanging.
             self._check_async_error()
 
-            # Send a ticker event and let the app process it
-            self.send_tick()
-            screenshot = BytesIO(self._client.get_screenshot())
-        else:
-            raise TimeoutError("Timeout waiting for screen change")
+            # Send ticker events and let the app process them
+            step = min(batch, max_ticks - ticks)
+            self.send_ticks(step)
+            ticks += step
+            batch = min(2 * batch, self._max_tick_batch)
+            screenshot, pixels, digest = self._get_screenshot()
 
         # Update self._last_screenshot to use it as reference for next calls
-        self._last_screenshot = screenshot
+        self._set_last_screenshot(screenshot, pixels, digest)
 
     def wait_for_home_screen(self, timeout: float = 10.0) -> None:
-        if screenshot_equal(self._last_screenshot, self._home_screenshot):
+        if self._last_screenshot_digest == self._home_screenshot_digest:
             return
 
         endtime = time() + timeout
         while True:
             self.wait_for_screen_change(endtime - time())
-            if screenshot_equal(self._last_screenshot, self._home_screenshot):
+            if self._last_screenshot_digest == self._home_screenshot_digest:
                 return
 
     @classmethod
@@ -413,8 +939,27 @@ class SpeculosBackend(BackendInterface):
         different_rng: bool = True,
         different_private: bool = True,
         different_attestation: bool = False,
+        start: bool = False,
+        max_workers: Optional[int] = None,
         **kwargs,
     ) -> List["SpeculosBackend"]:
+        """
+        Creates `number` instances of the same application, each with its own
+        ports (and by default its own seed, RNG and private key).
+
+        :param start: If True, the instances are also started, concurrently.
+                      They are then returned already entered, and the caller
+                      is responsible for exiting them. If any of them fails to
+                      start, all of them are stopped and the error is raised.
+        :type start: bool
+        :param max_workers: Maximum number of instances started at the same
+                            time when `start` is True. All of them by default.
+        :type max_workers: int
+
+        :raises ValueError: If `max_workers` is lower than 1
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers ({max_workers}) must be at least 1")
         logger = get_default_logger()
         logger.info(
             "Request to spawn %d Speculos instances of '%s'", number, application
@@ -423,8 +968,8 @@ class SpeculosBackend(BackendInterface):
         result: List["SpeculosBackend"] = list()
         while len(result) < number:
             tmp_kwargs = deepcopy(kwargs)
-            api_port = _get_unused_port_from(test_port)
-            apdu_port = _get_unused_port_from(api_port + 1)
+            api_port = reserve_port(test_port)
+            apdu_port = reserve_port(api_port + 1)
             logger.info(
                 "Instance %d ports: %d (API) and %s (APDU)",
                 len(result) + 1,
@@ -456,9 +1001,42 @@ class SpeculosBackend(BackendInterface):
                 additional_args = existing_args + additional_args
             tmp_kwargs["args"] = additional_args
             logger.info("Args: %s", tmp_kwargs["args"])
-            result.append(cls(application, device, *args, **tmp_kwargs))
+            instance = cls(application, device, *args, **tmp_kwargs)
+            # The ports were given as arguments: hand their leases to the instance
+            instance._leased_ports.extend([api_port, apdu_port])
+            result.append(instance)
+        if start:
+            cls._start_batch(result, max_workers)
         return result
 
+    @staticmethod
+    def _start_batch(
+        instances: List["SpeculosBackend"], max_workers: Optional[int]
+    ) -> None:
+        if not instances:
+            return
+        logger = get_default_logger()
+        start = time()
+        with ThreadPoolExecutor(max_workers=max_workers or len(instances)) as pool:
+            futures = [pool.submit(instance.__enter__) for instance in instances]
+            wait(futures)
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            logger.error(
+                "%d out of %d Speculos instances failed to start, stopping all of them",
+                len(errors),
+                len(instances),
+            )
+            for instance in instances:
+                try:
+                    instance.__exit__(None, None, None)
+                except Exception as error:
+                    logger.warning("Error while stopping a Speculos instance: %s", error)
+            raise errors[0]
+        for index, instance in enumerate(instances):
+            logger.info("Instance %d booted in %.2fs", index + 1, instance.boot_time)
+        logger.info("%d instances started in %.2fs", len(instances), time() - start)
+
 
 def has_data_available(response: ApduResponse, timeout: float = 0) -> bool:
     """Check if data is available without blocking by peeking at the socket"""
@@ -0,0 +1,311 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from speculos.client import ClientException, split_apdu
+from speculos.mcu.seproxyhal import TICKER_DELAY
+
+from ragger.utils import RAPDU, pack_APDU
+from .speculos import SpeculosBackend, apply_raise_policy
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _StaleConnection(ConnectionError):
+    """
+    A kept-alive connection was closed by the server before the request could
+    be processed: the request can safely be sent again on another connection.
+    """
+
+
+class _AsyncHttpClient:
+    """
+    Minimal HTTP/1.1 client on top of asyncio streams, covering what the
+    Speculos REST API needs: JSON requests, and responses delimited by a
+    `Content-Length`, by chunks or by the connection closure.
+
+    A request in flight holds a connection of its own (a pending `/apdu`
+    request must not block the ticks or screenshots sent meanwhile). Kept-alive
+    connections are reused by the next requests.
+    """
+
+    def __init__(self, host: str, port: int):
+        self._host = host
+        self._port = port
+        self._idle: List[_Connection] = list()
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def request(
+        self, method: str, path: str, payload: Optional[dict] = None
+    ) -> Tuple[int, bytes]:
+        """
+        :return: The response status code and body
+        :rtype: Tuple[int, bytes]
+        """
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                return await self._request(connection, method, path, payload)
+            except _StaleConnection:
+                continue
+        connection = await asyncio.open_connection(self._host, self._port)
+        return await self._request(connection, method, path, payload)
+
+    async def _request(
+        self,
+        connection: _Connection,
+        method: str,
+        path: str,
+        payload: Optional[dict],
+    ) -> Tuple[int, bytes]:
+        reader, writer = connection
+        keep_alive = False
+        try:
+            body = b"" if payload is None else json.dumps(payload).encode()
+            head = (
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self._host}:{self._port}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+            )
+            if payload is not None:
+                head += "Content-Type: application/json\r\n"
+            try:
+                writer.write(head.encode() + b"\r\n" + body)
+                await writer.drain()
+                status_line = await reader.readline()
+            except ConnectionError as error:
+                raise _StaleConnection(str(error)) from error
+            if not status_line:
+                raise _StaleConnection("Connection closed by the server")
+            version, status = status_line.decode().split(" ", 2)[:2]
+            headers = await self._read_headers(reader)
+            content, delimited = await self._read_body(reader, headers)
+            connection_header = headers.get("connection", "").lower()
+            if version == "HTTP/1.1":
+                keep_alive = delimited and connection_header != "close"
+            else:
+                keep_alive = delimited and connection_header == "keep-alive"
+            return int(status), content
+        finally:
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = dict()
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                return headers
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _read_body(
+        reader: asyncio.StreamReader, headers: Dict[str, str]
+    ) -> Tuple[bytes, bool]:
+        """
+        :return: The body, and whether it was delimited (if not, the connection
+                 cannot be reused)
+        """
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = list()
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise asyncio.IncompleteReadError(b"".join(chunks), None)
+                size = int(size_line.split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Trailers, up to the final empty line
+                    while (await reader.readline()).strip():
+                        pass
+                    return b"".join(chunks), True
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"])), True
+        return await reader.read(), False
+
+
+class AsyncSpeculosBackend(SpeculosBackend):
+    """
+    Speculos backend also exposing coroutines for its exchanges and screen
+    waits, so that a single event loop can drive many instances at once
+    without a thread per instance.
+
+    The coroutines talk to the Speculos API through :class:`_AsyncHttpClient`:
+    a pending APDU only holds a connection, never a thread, however many of
+    them are in flight. Screenshots are decoded in the loop's default executor,
+    so that the loop is never blocked.
+
+    The instance must be started with `async with`. The synchronous API of
+    :class:`SpeculosBackend` remains available.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = _AsyncHttpClient("127.0.0.1", self._api_port)
+        self._pending_async_task: Optional["asyncio.Future[RAPDU]"] = None
+
+    async def __aenter__(self) -> "AsyncSpeculosBackend":
+        # Spawning and waiting for the boot happens once per instance: it is
+        # delegated to a thread rather than reimplemented
+        await asyncio.to_thread(self.__enter__)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self._http.close()
+        await asyncio.to_thread(self.__exit__, *args)
+
+    async def _post(self, path: str, payload: dict) -> bytes:
+        status, content = await self._http.request("POST", path, payload)
+        if status != 200:
+            raise ClientException(
+                f"HTTP request on {path} failed, status={status}, error={content!r}"
+            )
+        return content
+
+    async def _apdu(self, data: bytes, tick_timeout: Optional[int] = None) -> RAPDU:
+        # Always through the HTTP API: concurrent exchanges each get a connection,
+        # where the raw APDU socket would interleave them
+        payload: dict = {"data": data.hex()}
+        if tick_timeout is not None:
+            payload["tick_timeout"] = tick_timeout
+        try:
+            content = await self._post("/apdu", payload)
+        except asyncio.IncompleteReadError:
+            # Speculos interrupts the response when the tick timeout expires
+            raise TimeoutError() from None
+        response, status = split_apdu(bytes.fromhex(json.loads(content)["data"]))
+        return RAPDU(status, response)
+
+    async def aexchange_raw(
+        self, data: bytes = b"", tick_timeout: int = 5 * 60 * 10
+    ) -> RAPDU:
+        """
+        Coroutine variant of :meth:`exchange_raw`.
+        """
+        self.apdu_logger.info("=> %s", data.hex())
+        return apply_raise_policy(self, await self._apdu(data, tick_timeout))
+
+    async def aexchange(
+        self,
+        cla: int,
+        ins: int,
+        p1: int = 0,
+        p2: int = 0,
+        data: bytes = b"",
+        tick_timeout: int = 5 * 60 * 10,
+    ) -> RAPDU:
+        """
+        Coroutine variant of :meth:`exchange`.
+        """
+        return await self.aexchange_raw(pack_APDU(cla, ins, p1, p2, data), tick_timeout)
+
+    @asynccontextmanager
+    async def aexchange_async_raw(self, data: bytes = b"") -> AsyncGenerator[None, None]:
+        """
+        Asynchronous context manager variant of :meth:`exchange_async_raw`: the
+        APDU is sent, then the control is given back to the caller. The
+        response is awaited when leaving the context, and stored into
+        :attr:`last_async_response`.
+        """
+        self.apdu_logger.info("=> %s", data.hex())
+        self._last_async_response = None
+        task = asyncio.ensure_future(self._apdu(data))
+        self._pending_async_task = task
+        try:
+            yield
+            # Only retrieve if not already retrieved by _acheck_async_error
+            if self._last_async_response is None:
+                self._last_async_response = apply_raise_policy(self, await task)
+        finally:
+            self._pending_async_task = None
+            if not task.done():
+                task.cancel()
+
+    @asynccontextmanager
+    async def aexchange_async(
+        self, cla: int, ins: int, p1: int = 0, p2: int = 0, data: bytes = b""
+    ) -> AsyncGenerator[None, None]:
+        """
+        Asynchronous context manager variant of :meth:`exchange_async`.
+        """
+        async with self.aexchange_async_raw(pack_APDU(cla, ins, p1, p2, data)):
+            yield
+
+    def _acheck_async_error(self) -> None:
+        task = self._pending_async_task
+        if task is not None and task.done() and self._last_async_response is None:
+            # This will raise ExceptionRAPDU immediately if status != 9000
+            self._last_async_response = apply_raise_policy(self, task.result())
+
+    async def asend_tick(self) -> None:
+        """
+        Coroutine variant of :meth:`send_tick`.
+        """
+        await self._post("/ticker", {"action": "single-step"})
+
+    async def aget_screenshot(self) -> bytes:
+        """
+        :return: The current screen, as a PNG image
+        :rtype: bytes
+        """
+        status, content = await self._http.request("GET", "/screenshot")
+        if status != 200:
+            raise ClientException(f"HTTP request on /screenshot failed, status={status}")
+        return content
+
+    async def _aget_decoded_screenshot(self):
+        screenshot = BytesIO(await self.aget_screenshot())
+        # Decoding is CPU-bound: kept off the event loop
+        pixels, digest = await asyncio.get_running_loop().run_in_executor(
+            None, self._decode_screenshot, screenshot
+        )
+        return screenshot, pixels, digest
+
+    async def await_screen_change(self, timeout: float = 10.0) -> None:
+        """
+        Coroutine variant of :meth:`wait_for_screen_change`.
+        """
+        max_ticks = int(timeout / TICKER_DELAY)
+        ticks = 0
+        batch = 1
+        screenshot, pixels, digest = await self._aget_decoded_screenshot()
+        while digest == self._last_screenshot_digest:
+            if ticks >= max_ticks:
+                raise TimeoutError("Timeout waiting for screen change")
+            self._acheck_async_error()
+            step = min(batch, max_ticks - ticks)
+            for _ in range(step):
+                await self.asend_tick()
+            ticks += step
+            batch = min(2 * batch, self._max_tick_batch)
+            screenshot, pixels, digest = await self._aget_decoded_screenshot()
+
+        # Update self._last_screenshot to use it as reference for next calls
+        self._set_last_screenshot(screenshot, pixels, digest)
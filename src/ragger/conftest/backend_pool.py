@@ -0,0 +1,150 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Session-wide pool of started Speculos instances.
+#
+# Booting Speculos (QEMU start, then waiting for the application to display its
+# home screen) is the most expensive part of a `backend` fixture. With the pool
+# enabled (`configuration.OPTIONAL.BACKEND_POOL`), an instance is started the
+# first time a given configuration is requested, and handed back to the pool
+# instead of being stopped when the fixture ends. The next fixture requesting
+# the same configuration gets it already booted.
+#
+# Instances are only reused if they can be reset (see `SpeculosBackend.reset`):
+# an instance whose application did not get back to its home screen is stopped.
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ledgered.devices import Device
+
+from ragger.backend import SpeculosBackend
+from ragger.logger import get_default_logger
+
+PoolKey = Tuple[Hashable, ...]
+
+
+class BackendPool:
+    """
+    Pool of started :class:`SpeculosBackend` instances, indexed by the
+    configuration they were started with.
+    """
+
+    def __init__(self, reset_timeout: float = 5.0):
+        """
+        :param reset_timeout: Maximum time given to a released instance to get
+                              back to its home screen
+        :type reset_timeout: float
+        """
+        self._reset_timeout = reset_timeout
+        self._idle: Dict[PoolKey, List[SpeculosBackend]] = defaultdict(list)
+        self._started: List[SpeculosBackend] = list()
+        self.logger = get_default_logger()
+
+    @staticmethod
+    def key(
+        application: Path,
+        device: Device,
+        speculos_args: Sequence[str],
+        coverage_trace_dir: Optional[Path] = None,
+    ) -> PoolKey:
+        """
+        Computes the pool key of a configuration. Two fixtures can share an
+        instance only if they run the same ELF on the same device with the same
+        Speculos arguments (seed included).
+
+        :return: The pool key
+        :rtype: Tuple
+        """
+        return (
+            str(application),
+            device.name,
+            tuple(speculos_args),
+            str(coverage_trace_dir) if coverage_trace_dir is not None else None,
+        )
+
+    @property
+    def started(self) -> int:
+        """
+        :return: The number of running instances, idle or not
+        :rtype: int
+        """
+        return len(self._started)
+
+    def idle(self, key: PoolKey) -> int:
+        """
+        :return: The number of idle instances for the given key
+        :rtype: int
+        """
+        return len(self._idle.get(key, []))
+
+    def acquire(
+        self, key: PoolKey, factory: Callable[[], SpeculosBackend]
+    ) -> SpeculosBackend:
+        """
+        Returns an idle instance matching `key`, or starts a new one.
+
+        :param key: The configuration key (see :meth:`key`)
+        :type key: Tuple
+        :param factory: Creates a new (not started) instance for this key
+        :type factory: Callable[[], SpeculosBackend]
+
+        :return: A started backend
+        :rtype: SpeculosBackend
+        """
+        idle = self._idle.get(key)
+        if idle:
+            self.logger.info("Reusing a pooled Speculos instance")
+            return idle.pop()
+        backend = factory()
+        backend.__enter__()
+        self._started.append(backend)
+        return backend
+
+    def release(self, key: PoolKey, backend: SpeculosBackend) -> None:
+        """
+        Resets a backend and gives it back to the pool. If it cannot be reset,
+        the instance is stopped.
+
+        :param key: The key `backend` was acquired with
+        :type key: Tuple
+        :param backend: The backend to release
+        :type backend: SpeculosBackend
+        """
+        try:
+            backend.reset(self._reset_timeout)
+        except Exception as error:
+            self.logger.warning(
+                "Speculos instance could not be reset (%s), stopping it", error
+            )
+            self._stop(backend)
+            return
+        self._idle[key].append(backend)
+
+    def close(self) -> None:
+        """
+        Stops every instance started by the pool.
+        """
+        while self._started:
+            self._stop(self._started[-1])
+        self._idle.clear()
+
+    def _stop(self, backend: SpeculosBackend) -> None:
+        self._started.remove(backend)
+        try:
+            backend.__exit__(None, None, None)
+        except Exception as error:
+            self.logger.warning("Error while stopping a Speculos instance: %s", error)
@@ -3,11 +3,14 @@ import pytest
 import logging
 import warnings
 from dataclasses import fields
+from functools import lru_cache
+from hashlib import blake2b
 from ledgered.devices import Device, Devices
 from ledgered.manifest import Manifest
 from pathlib import Path
 from typing import Generator, List, Optional
 from unittest.mock import MagicMock
+from weakref import WeakSet
 
 from ragger.backend import (
     BackendInterface,
@@ -16,13 +19,14 @@ from ragger.backend import (
     LedgerWalletBackend,
 )
 from ragger.firmware import Firmware
-from ragger.logger import init_loggers, standalone_conf_logger
+from ragger.logger import init_loggers, set_apdu_logger_file, standalone_conf_logger
 from ragger.navigator import (
     Navigator,
     NanoNavigator,
     TouchNavigator,
     NavigateWithScenario,
 )
+from ragger.navigator.plan_cache import NavigationPlanCache
 from ragger.utils import (
     find_project_root_dir,
     find_library_application,
@@ -37,6 +41,7 @@ from ragger.error import ExceptionRAPDU, MissingElfError, StatusWords
 from ragger.utils.structs import RAPDU
 
 from . import configuration as conf
+from .backend_pool import BackendPool
 
 BACKENDS = ["speculos", "ledgercomm", "ledgerwallet"]
 
@@ -530,6 +535,27 @@ def prepare_speculos_args(
     return (main_app_path, {"args": speculos_args})
 
 
+def create_speculos_backend(
+    main_app_path: Path,
+    device: Device,
+    speculos_args: dict,
+    log_apdu_file: Optional[Path],
+    coverage_trace_dir: Optional[Path] = None,
+) -> SpeculosBackend:
+    """
+    Instantiates a Speculos backend from the arguments given by
+    `prepare_speculos_args`, be it a new or a pooled one.
+    """
+    return SpeculosBackend(
+        main_app_path,
+        device=device,
+        log_apdu_file=log_apdu_file,
+        coverage_trace_dir=coverage_trace_dir,
+        golden_manifests=conf.OPTIONAL.GOLDEN_MANIFESTS,
+        **speculos_args,
+    )
+
+
 # Depending on the "--backend" option value, a different backend is
 # instantiated, and the tests will either run on Speculos or on a physical
 # device depending on the backend
@@ -568,12 +594,8 @@ def create_backend(
             verbose_speculos,
             ignore_missing_binaries,
         )
-        return SpeculosBackend(
-            main_app_path,
-            device=device,
-            log_apdu_file=log_apdu_file,
-            coverage_trace_dir=coverage_trace_dir,
-            **speculos_args,
+        return create_speculos_backend(
+            main_app_path, device, speculos_args, log_apdu_file, coverage_trace_dir
         )
     else:
         raise ValueError(
@@ -581,6 +603,61 @@ def create_backend(
         )
 
 
+@pytest.fixture(scope="session")
+def backend_pool() -> Generator[BackendPool, None, None]:
+    pool = BackendPool()
+    yield pool
+    pool.close()
+
+
+def pooled_speculos_backend(
+    pool: BackendPool,
+    root_pytest_dir: Path,
+    device: Device,
+    display: bool,
+    pki_prod: bool,
+    log_apdu_file: Optional[Path],
+    cli_user_seed: str,
+    additional_speculos_arguments: List[str],
+    verbose_speculos: bool = False,
+    ignore_missing_binaries: bool = False,
+    coverage_trace_dir: Optional[Path] = None,
+) -> Generator[SpeculosBackend, None, None]:
+    """
+    Same as `create_backend` + entering the backend, but the Speculos instance
+    is taken from (and given back to) the session pool.
+    """
+    try:
+        main_app_path, speculos_args = prepare_speculos_args(
+            root_pytest_dir,
+            device,
+            display,
+            pki_prod,
+            cli_user_seed,
+            additional_speculos_arguments,
+            verbose_speculos,
+            ignore_missing_binaries,
+        )
+    except MissingElfError as e:
+        pytest.fail(f"Missing ELF: {e}")
+
+    key = BackendPool.key(
+        main_app_path, device, speculos_args["args"], coverage_trace_dir
+    )
+    b = pool.acquire(
+        key,
+        lambda: create_speculos_backend(
+            main_app_path, device, speculos_args, log_apdu_file, coverage_trace_dir
+        ),
+    )
+    if log_apdu_file:
+        set_apdu_logger_file(log_apdu_file=log_apdu_file)
+    try:
+        yield b
+    finally:
+        pool.release(key, b)
+
+
 # Backend scope can be configured by the user
 # fixture skip_tests_for_unsupported_devices is a dependency because we want to skip the test
 # before trying to find the binary
@@ -598,12 +675,28 @@ def backend(
     verbose_speculos: bool,
     ignore_missing_binaries: bool,
     coverage_enabled: bool,
+    request,
 ) -> Generator[BackendInterface, None, None]:
     # to separate the test name and its following logs
     print("")
     coverage_trace_dir = None
     if coverage_enabled:
         coverage_trace_dir = root_pytest_dir / COVERAGE_TRACE_ROOT / device.name
+    if conf.OPTIONAL.BACKEND_POOL and backend_name.lower() == "speculos":
+        yield from pooled_speculos_backend(
+            request.getfixturevalue("backend_pool"),
+            root_pytest_dir,
+            device,
+            display,
+            pki_prod,
+            log_apdu_file,
+            cli_user_seed,
+            additional_speculos_arguments,
+            verbose_speculos,
+            ignore_missing_binaries,
+            coverage_trace_dir,
+        )
+        return
     backend_instance = None
     try:
         backend_instance = create_backend(
@@ -638,6 +731,24 @@ def backend(
         yield b
 
 
+# Backends which already served a test, and must be restored before the next one
+_USED_BACKENDS: "WeakSet[BackendInterface]" = WeakSet()
+
+
+@pytest.fixture(autouse=True)
+def restore_backend_checkpoint(request, backend_name: str):
+    if (
+        conf.OPTIONAL.RESTORE_CHECKPOINT
+        and backend_name.lower() == "speculos"
+        and "backend" in request.fixturenames
+    ):
+        backend_instance = request.getfixturevalue("backend")
+        if backend_instance in _USED_BACKENDS:
+            backend_instance.restore_checkpoint()
+        _USED_BACKENDS.add(backend_instance)
+    yield
+
+
 @pytest.fixture(scope=conf.OPTIONAL.BACKEND_SCOPE)
 def navigator(
     backend: BackendInterface,
@@ -655,6 +766,49 @@ def navigator(
         return TouchNavigator(backend, device, golden_run)
 
 
+@lru_cache(maxsize=None)
+def _file_digest(path: Path) -> str:
+    return blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+@pytest.fixture(scope="session")
+def navigation_plan_cache(pytestconfig) -> Optional[NavigationPlanCache]:
+    if not conf.OPTIONAL.NAVIGATION_PLAN_CACHE or pytestconfig.cache is None:
+        return None
+    return NavigationPlanCache(pytestconfig.cache, pytestconfig.rootpath)
+
+
+@pytest.fixture(autouse=True)
+def navigation_plan_scope(request, backend_name: str):
+    plans = request.getfixturevalue("navigation_plan_cache")
+    if (
+        plans is None
+        or backend_name.lower() != "speculos"
+        or "navigator" not in request.fixturenames
+    ):
+        yield
+        return
+    navigator_instance = request.getfixturevalue("navigator")
+    backend_instance = request.getfixturevalue("backend")
+    if not isinstance(navigator_instance, Navigator) or not isinstance(
+        backend_instance, SpeculosBackend
+    ):
+        yield
+        return
+    # Plans depend on the test, the device and the exact application binary
+    plans.start(
+        request.node.nodeid,
+        backend_instance.device.name,
+        _file_digest(backend_instance._application),
+    )
+    navigator_instance.plan_cache = plans
+    try:
+        yield
+    finally:
+        plans.stop()
+        navigator_instance.plan_cache = None
+
+
 @pytest.fixture(scope="function")
 def scenario_navigator(
     backend: BackendInterface,
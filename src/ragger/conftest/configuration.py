@@ -9,6 +9,10 @@ class OptionalOptions:
     SIDELOADED_APPS: dict
     SIDELOADED_APPS_DIR: Optional[str]
     BACKEND_SCOPE: str
+    BACKEND_POOL: bool
+    RESTORE_CHECKPOINT: bool
+    NAVIGATION_PLAN_CACHE: bool
+    GOLDEN_MANIFESTS: bool
     CUSTOM_SEED: str
     ALLOWED_SETUPS: List[str]
 
@@ -42,6 +46,31 @@ OPTIONAL = OptionalOptions(
     # When using "session" all your tests will share a single backend instance (faster)
     # When using "function" each test will have its independent backend instance (no collusion)
     BACKEND_SCOPE="class",
+    # Speculos only. When True, Speculos instances are kept running for the whole session and handed
+    # from one backend fixture to the next one using the same configuration (application, device,
+    # Speculos arguments and seed), instead of being restarted for every backend scope.
+    # An instance is reused only if its application got back to its home screen at the end of the
+    # previous fixture, else it is stopped and a new one is started.
+    # Combined with BACKEND_SCOPE="function", this gives one Speculos boot per worker instead of one
+    # per test, but the application state (NVRAM, settings...) is carried over between tests.
+    BACKEND_POOL=False,
+    # Speculos only. When True, a Speculos backend shared between several tests (see BACKEND_SCOPE)
+    # is restored to its state right after boot (RAM, NVRAM, display) before each test but the first
+    # one using it. This gives each test a pristine application, as with BACKEND_SCOPE="function",
+    # without creating a new backend for every test.
+    RESTORE_CHECKPOINT=False,
+    # Speculos only. When True, the navigation steps discovered by `navigate_until_text` flows (and
+    # the `NavigateWithScenario` ones built on them) are stored in the pytest cache, per test, device
+    # and application ELF, as the fingerprints of the screens they reach. The next runs replay these
+    # steps without looking for the text before each of them, and only check it at the end. When a
+    # step reaches another screen, or the text is not found at the end, the plan is dropped and the
+    # text is looked for step by step again.
+    NAVIGATION_PLAN_CACHE=False,
+    # Speculos only. When True, golden runs also write into each snapshot directory a manifest
+    # (`digests.json`) holding the digest of the pixels of every golden. Tests then compare screens
+    # with these digests, and only read and decode a golden when its digest does not match. Manifests
+    # are only read and updated when this option is enabled.
+    GOLDEN_MANIFESTS=False,
     # Use this parameter if you want speculos to use a custom seed instead of the default one.
     # This would result in speculos being launched with --seed <CUSTOM_SEED>
     # If a seed is provided through the "--seed" pytest command line option, it will override this one.
@@ -14,17 +14,22 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import os
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from time import time
-from typing import Callable, Dict, Optional, Sequence, Union
+from random import uniform
+from time import sleep, time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
 from ledgered.devices import Device
 
 from ragger.backend import BackendInterface, SpeculosBackend
+from ragger.logger import get_default_logger
 from ragger.utils import Crop
+from ragger.utils.packed_snapshots import is_packed_directory
 
 from .instruction import BaseNavInsID, NavIns, NavInsID
+from .plan_cache import NavigationPlanCache
 
 LAST_SCREEN_UPDATE_TIMEOUT = 2
 InstructionType = Union[NavIns, BaseNavInsID]
@@ -34,6 +39,11 @@ class Navigator(ABC):
     GOLDEN_INSTRUCTION_SLEEP_MULTIPLIER_FIRST = 2
     GOLDEN_INSTRUCTION_SLEEP_MULTIPLIER_MIDDLE = 5
     GOLDEN_INSTRUCTION_SLEEP_MULTIPLIER_LAST = 2
+    # Bounds (in seconds) of the delay between two snapshot comparisons while
+    # waiting for a snapshot: it doubles from the floor up to the ceiling, and
+    # is jittered so that concurrent emulators are not polled in lockstep.
+    SNAP_POLL_FLOOR = 0.005
+    SNAP_POLL_CEILING = 0.1
 
     def __init__(
         self,
@@ -57,6 +67,14 @@ class Navigator(ABC):
         self._device = device
         self._callbacks = callbacks
         self._golden_run = golden_run
+        # Number of comparisons each snapshot awaited with a timeout took to match
+        self.snap_match_polls: List[int] = list()
+        # When comparisons are deferred, screens captured for each snapshot (the
+        # captured PNG, its golden and temporary paths), compared at the end
+        self._deferred_snaps: Optional[List[Tuple[bytes, Path, Path]]] = None
+        # When set, the number of steps discovered by `navigate_until_text` flows is
+        # stored there, and replayed by the next runs of the same flows
+        self.plan_cache: Optional[NavigationPlanCache] = None
 
     def _get_snaps_dir_path(
         self, path: Path, test_case_name: Union[Path, str], is_golden: bool
@@ -74,7 +92,7 @@ class Navigator(ABC):
         if not dir_path.is_dir():
             if self._golden_run:
                 dir_path.mkdir(parents=True)
-            else:
+            elif not is_packed_directory(dir_path):
                 raise ValueError(
                     f"Golden snapshots directory ({dir_path}) does not exist."
                 )
@@ -102,6 +120,10 @@ class Navigator(ABC):
     def _get_snap_path(self, path: Path, index: int) -> Path:
         return path / f"{str(index).zfill(5)}.png"
 
+    def _last_screen_fingerprint(self) -> Optional[str]:
+        fingerprint = self._backend.last_screen_fingerprint()
+        return None if fingerprint is None else fingerprint.hex()
+
     def _compare_snap_with_timeout(
         self,
         path: Path,
@@ -109,24 +131,61 @@ class Navigator(ABC):
         crop: Optional[Crop] = None,
         tmp_snap_path: Optional[Path] = None,
     ) -> bool:
-        start = time()
-        now = start
-        while not (now - start > timeout_s):
+        deadline = time() + timeout_s
+        delay = self.SNAP_POLL_FLOOR
+        polls = 0
+        while True:
+            polls += 1
             if self._backend.compare_screen_with_snapshot(
                 path, crop, tmp_snap_path=tmp_snap_path
             ):
+                self.snap_match_polls.append(polls)
                 return True
-            now = time()
-        return False
+            remaining = deadline - time()
+            if remaining <= 0:
+                return False
+            # Let the screen progress rather than hammering the backend
+            sleep(min(uniform(delay / 2, delay), remaining))
+            delay = min(2 * delay, self.SNAP_POLL_CEILING)
 
     def _compare_snap(self, snaps_tmp_path: Path, snaps_golden_path: Path, index: int):
         golden = self._get_snap_path(snaps_golden_path, index)
         tmp = self._get_snap_path(snaps_tmp_path, index)
 
+        if self._deferred_snaps is not None:
+            screen = self._backend.get_screenshot()
+            if screen is not None:
+                self._deferred_snaps.append((screen, golden, tmp))
+                return
+
         assert self._backend.compare_screen_with_snapshot(
             golden, tmp_snap_path=tmp, golden_run=self._golden_run
         ), f"Screen does not match golden '{tmp}'"
 
+    def _compare_deferred_snaps(self, snaps: List[Tuple[bytes, Path, Path]]) -> None:
+        if not snaps:
+            return
+
+        # Compared through the backend, so that goldens are served by its cache (and
+        # manifests), and golden runs record them as a regular comparison does. The
+        # comparisons are independent, and mostly spent decoding images (which
+        # releases the GIL): they run in parallel.
+        def compare(snap: Tuple[bytes, Path, Path]) -> bool:
+            screen, golden, _ = snap
+            return self._backend.compare_screenshot_with_snapshot(
+                screen, golden, golden_run=self._golden_run
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(snaps), os.cpu_count() or 1),
+            thread_name_prefix="ragger-deferred-compare",
+        ) as pool:
+            matches = list(pool.map(compare, snaps))
+        mismatches = [str(tmp) for (_, _, tmp), match in zip(snaps, matches) if not match]
+        assert not mismatches, "Screens do not match goldens: " + ", ".join(
+            f"'{tmp}'" for tmp in mismatches
+        )
+
     def add_callback(
         self, ins_id: BaseNavInsID, callback: Callable, override: bool = True
     ) -> None:
@@ -177,31 +236,33 @@ class Navigator(ABC):
             # content known by the backend.
             # Therefore simply calling wait_for_screen_change() here will result in
             # race issues.
-            # That's why we are first backuping the screen content in a temp file.
-            # This screen content is then used to check if the screen changed enough,
+            # That's why we are first capturing the screen content as a reference.
+            # This reference is then used to check if the screen changed enough,
             # e.g. with cropping the progress bar from the screen.
-            with NamedTemporaryFile(suffix=".png") as tmp:
-                tmp_file = Path(tmp.name)
-                # Backup screen content before instruction in tmp file
-                self._backend.compare_screen_with_snapshot(
-                    tmp_file, tmp_snap_path=tmp_file, golden_run=True
-                )
+            reference = self._backend.capture_reference()
 
-                # Call instruction callback
-                self._callbacks[instruction.id](*instruction.args, **instruction.kwargs)
-
-                # Wait for screen change unless explicitly specify otherwise
-                if wait_for_screen_change:
-                    # Compare to previous backup file without considering the bottom
-                    # which holds the progress bar.
-                    cropping = Crop(lower=220)
-                    endtime = time() + timeout
-                    while True:
-                        self._backend.wait_for_screen_change(endtime - time())
-                        if not self._backend.compare_screen_with_snapshot(
-                            tmp_file, cropping
-                        ):
-                            break
+            # Call instruction callback
+            self._callbacks[instruction.id](*instruction.args, **instruction.kwargs)
+
+            # Wait for screen change unless explicitly specify otherwise
+            if wait_for_screen_change:
+                # Compare to the reference without considering the bottom which
+                # holds the progress bar.
+                cropping = Crop(lower=220)
+                endtime = time() + timeout
+                # Whether the screen preceding the last change was compared with
+                # the reference (and did not differ from it)
+                compared = False
+                while True:
+                    self._backend.wait_for_screen_change(endtime - time())
+                    if compared and not self._backend.last_change_within(cropping):
+                        # Only the progress bar was updated: the screen still does
+                        # not differ from the reference
+                        continue
+                    # The screen just detected is compared, not captured again
+                    if self._backend.last_screen_differs_from(reference, cropping):
+                        break
+                    compared = True
 
         else:
             # Call instruction callback
@@ -243,6 +304,7 @@ class Navigator(ABC):
         screen_change_before_first_instruction: bool = True,
         screen_change_after_last_instruction: bool = True,
         snap_start_idx: int = 0,
+        deferred_compare: bool = False,
     ) -> None:
         """
         Navigate on the device according to a set of navigation instructions
@@ -265,12 +327,37 @@ class Navigator(ABC):
         :type screen_change_after_last_instruction: bool
         :param snap_start_idx: Index of the first snap for this navigation.
         :type snap_start_idx: int
+        :param deferred_compare: Only capture the screens during the navigation, then compare them
+                                 all with their golden snapshots at the end (in parallel), and
+                                 report every mismatch at once. Backends which cannot capture
+                                 the screen compare each step as usual.
+        :type deferred_compare: bool
 
         :raises ValueError: If one of the snapshots does not match.
 
         :return: None
         :rtype: NoneType
         """
+        if deferred_compare:
+            self._deferred_snaps = list()
+            try:
+                self.navigate_and_compare(
+                    path,
+                    test_case_name,
+                    instructions,
+                    timeout,
+                    screen_change_before_first_instruction,
+                    screen_change_after_last_instruction,
+                    snap_start_idx,
+                )
+            finally:
+                snaps = self._deferred_snaps
+                self._deferred_snaps = None
+                # Captured screens are kept, even when the navigation failed
+                for screen, _, tmp in snaps:
+                    tmp.write_bytes(screen)
+            self._compare_deferred_snaps(snaps)
+            return
 
         self._backend.pause_ticker()
 
@@ -551,8 +638,59 @@ class Navigator(ABC):
             snap_idx=idx,
         )
 
+        plans = self.plan_cache
+        plan_key = None
+        planned_steps = None
+        # Fingerprints of the screens reached by each navigation step
+        reached_steps: List[Optional[str]] = list()
+        found = False
+        if plans is not None:
+            plan_key = plans.key(
+                plans.instruction(navigate_instruction),
+                text,
+                plans.path(path),
+                str(test_case_name),
+                str(idx),
+            )
+            if plan_key is not None:
+                planned_steps = plans.get(plan_key)
+        if planned_steps:
+            assert plans is not None and plan_key is not None
+            # The steps are known from a previous run: replay them without looking for
+            # the text before each step, as long as each one reaches the same screen
+            # as then. Another screen means the flow changed, and may hold the text.
+            found = self._backend.compare_screen_with_text(text)
+            diverged = found
+            for expected in planned_steps:
+                if diverged:
+                    break
+                remaining = timeout - (time() - start)
+                if remaining < 0:
+                    raise TimeoutError(f"Timeout waiting for text {text}")
+                idx += 1
+                self._run_instruction(
+                    navigate_instruction,
+                    remaining,
+                    wait_for_screen_change=True,
+                    path=path,
+                    test_case_name=test_case_name,
+                    snap_idx=idx,
+                )
+                reached_steps.append(self._last_screen_fingerprint())
+                diverged = reached_steps[-1] != expected
+            if not diverged:
+                found = self._backend.compare_screen_with_text(text)
+            if not found:
+                # The flow changed: keep looking for the text step by step
+                get_default_logger().warning(
+                    "Navigation diverged from its plan after %d steps, looking for text '%s'",
+                    len(reached_steps),
+                    text,
+                )
+                plans.drop(plan_key)
+
         # Navigate until the text specified in argument is found.
-        while True:
+        while not found:
             if self._backend.compare_screen_with_text(text):
                 # Validation screen text found, exit the loop
                 break
@@ -572,6 +710,13 @@ class Navigator(ABC):
                     test_case_name=test_case_name,
                     snap_idx=idx,
                 )
+                reached_steps.append(self._last_screen_fingerprint())
+
+        if plan_key is not None and reached_steps != planned_steps:
+            assert plans is not None
+            # Only backends fingerprinting the screens can replay plans
+            if None not in reached_steps:
+                plans.set(plan_key, cast(List[str], reached_steps))
 
         # Perform navigation validation instructions in an "navigate_and_compare" way.
         if validation_instructions:
@@ -0,0 +1,153 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Navigation plans of the `navigate_until_text` flows.
+#
+# These flows discover how many navigation steps lead to the expected text by
+# fetching and matching the screen content before every step. Once discovered,
+# the steps are stored as the fingerprints of the screens they reached, so that
+# the next runs of the same flow replay the steps directly, only checking that
+# each one reaches the expected screen (which the screen change detection
+# already fingerprints), then the text at the end. A replay which reaches
+# another screen goes back to looking for the text before each step: the flow
+# got shorter or longer, and the text may be on this very screen.
+#
+# A plan is identified by a scope (typically the test, the device and the
+# application ELF digest) and by the parameters of the navigation call:
+# instructions are described by their ID and arguments (not by their object
+# identity), and paths are made relative to a root directory (the pytest one),
+# so that keys do not change from one run or checkout to another. As the same
+# call can be made several times in a test, the calls made within a scope are
+# also numbered.
+#
+# Plans are persisted into a key/value store with the `get(key, default)` /
+# `set(key, value)` interface of pytest's cache (`config.cache`). Each plan is
+# stored under its own key, so that concurrent pytest-xdist workers never
+# overwrite each other's plans.
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .instruction import BaseNavInsID, NavIns
+
+
+class NavigationPlanCache:
+    """
+    Number of navigation steps discovered by `navigate_until_text` flows.
+    """
+
+    KEY_PREFIX = "ragger/navigation_plans"
+
+    def __init__(self, store: Any, root_dir: Optional[Path] = None):
+        """
+        :param store: Where the plans are persisted: pytest's `config.cache`, or
+                      any object with the same `get` / `set` methods
+        :type store: Any
+        :param root_dir: Directory the paths identifying calls are made relative to
+        :type root_dir: Path
+        """
+        self._store = store
+        self._root_dir = root_dir
+        self._scope: Optional[str] = None
+        self._calls: Dict[str, int] = dict()
+
+    def start(self, *scope: str) -> None:
+        """
+        Starts a scope (a test): the keys returned by :meth:`key` are then
+        specific to it. Calls are numbered from the start of the scope.
+
+        :param scope: What identifies the scope (test name, device, ELF digest...)
+        :type scope: str
+        """
+        self._scope = "/".join(scope)
+        self._calls.clear()
+
+    def stop(self) -> None:
+        """
+        Ends the current scope. No plan is used until the next one starts.
+        """
+        self._scope = None
+
+    def key(self, *call: str) -> Optional[str]:
+        """
+        :param call: What identifies the navigation call (instruction, text...)
+        :type call: str
+
+        :return: The key of the plan of this call, or `None` outside of a scope
+        :rtype: Optional[str]
+        """
+        if self._scope is None:
+            return None
+        name = "/".join((self._scope, *call))
+        index = self._calls.get(name, 0)
+        self._calls[name] = index + 1
+        digest = blake2b(f"{name}#{index}".encode(), digest_size=16).hexdigest()
+        return f"{self.KEY_PREFIX}/{digest}"
+
+    def instruction(self, instruction: Union[NavIns, BaseNavInsID]) -> str:
+        """
+        :param instruction: The instruction of a navigation call
+        :type instruction: Union[NavIns, BaseNavInsID]
+
+        :return: A description of the instruction, equal for equal instructions
+        :rtype: str
+        """
+        if isinstance(instruction, BaseNavInsID):
+            instruction = NavIns(instruction)
+        instruction_id = instruction.id
+        if isinstance(instruction_id, BaseNavInsID):
+            instruction_id = f"{type(instruction_id).__name__}.{instruction_id.name}"
+        kwargs = sorted(instruction.kwargs.items())
+        return f"{instruction_id!s}({tuple(instruction.args)!r}, {kwargs!r})"
+
+    def path(self, path: Optional[Union[str, Path]]) -> str:
+        """
+        :param path: A path identifying a navigation call
+        :type path: Optional[Union[str, Path]]
+
+        :return: The path, relative to the root directory when under it
+        :rtype: str
+        """
+        if path is not None and self._root_dir is not None:
+            try:
+                return Path(path).relative_to(self._root_dir).as_posix()
+            except ValueError:
+                pass
+        return str(path)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        :return: The fingerprints (hex) of the screens reached by each navigation
+                 step of the plan, if known
+        :rtype: Optional[List[str]]
+        """
+        steps = self._store.get(key, None)
+        if isinstance(steps, list) and all(isinstance(step, str) for step in steps):
+            return steps
+        return None
+
+    def set(self, key: str, steps: List[str]) -> None:
+        """
+        Stores the fingerprints (hex) of the screens reached by each navigation
+        step of a plan.
+        """
+        self._store.set(key, steps)
+
+    def drop(self, key: str) -> None:
+        """
+        Forgets a plan which did not lead to the expected screen.
+        """
+        self._store.set(key, None)
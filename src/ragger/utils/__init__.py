@@ -15,7 +15,7 @@ limitations under the License.
 """
 
 from .structs import RAPDU, Crop
-from .packing import pack_APDU
+from .packing import pack_APDU, iter_chunks, chunked_APDUs
 from .misc import find_library_application, prefix_with_len, find_project_root_dir
 from .misc import create_currency_config, split_message, find_application
 
@@ -24,6 +24,8 @@ __all__ = [
     "create_currency_config",
     "Crop",
     "pack_APDU",
+    "iter_chunks",
+    "chunked_APDUs",
     "prefix_with_len",
     "RAPDU",
     "split_message",
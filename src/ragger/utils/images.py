@@ -0,0 +1,269 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Decoded screen images for the Speculos backend.
+#
+# Screens and golden snapshots are compared as NumPy arrays of RGB pixels
+# (`uint8`, shape `(height, width, 3)`) rather than as PIL images: crops are
+# plain array slices and equality is a single vectorized comparison.
+#
+# Golden snapshots are decoded once and kept in a process-wide LRU cache, keyed
+# by the file path, its modification time and size (so a golden rewritten by a
+# `--golden_run`, or a rebuilt pack, is reloaded) and the crop applied to it.
+# The cache is bounded by the total size of the arrays it holds, not by a number
+# of entries, as Stax / Flex / Apex screens are much bigger than Nano ones.
+#
+# Images can also be reduced to a fingerprint (a BLAKE2 digest of their decoded
+# pixels), so that checking two screens for equality is a digest comparison.
+# When they differ, the bounding box of the changed pixels tells which area of
+# the screen was updated.
+#
+# Goldens missing from the filesystem are read from the blob they reference (see
+# `ragger.utils.snapshot_blobs`, identical goldens then share their cache
+# entries), or from the snapshot pack covering their directory (see
+# `ragger.utils.packed_snapshots`).
+from collections import OrderedDict
+from hashlib import blake2b
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from ragger.utils.packed_snapshots import read_packed
+from ragger.utils.snapshot_blobs import resolve_blob
+from ragger.utils.structs import Crop
+
+# Default memory budget of the golden snapshots cache
+DEFAULT_CACHE_BUDGET = 256 * 1024 * 1024
+
+ImageSource = Union[str, Path, BytesIO, bytes]
+# A `(left, upper, right, lower)` box, right and lower bounds excluded (as
+# returned by `PIL.Image.getbbox`)
+Region = Tuple[int, int, int, int]
+
+
+def _resolve(path: Union[str, Path]) -> Tuple[str, Tuple, ImageSource]:
+    # Returns what identifies the image, a stamp changing whenever the image
+    # changes, and where to read it
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        blob = resolve_blob(path)
+        if blob is not None:
+            # Blobs never change, and are shared by every golden referencing them
+            return str(blob), (), blob
+        packed = read_packed(path)
+        if packed is None:
+            raise
+        return str(path), packed[1], packed[0]
+    return str(path), (stat.st_mtime_ns, stat.st_size), path
+
+
+def decode_image(source: ImageSource) -> np.ndarray:
+    """
+    Decodes an image (file path, in-memory file or raw encoded bytes) into an
+    RGB array. A file path missing from the filesystem is read from the blob it
+    references or the snapshot pack covering it, if any.
+
+    :param source: The image to decode
+    :type source: Union[str, Path, BytesIO, bytes]
+
+    :return: The decoded pixels, shape `(height, width, 3)`
+    :rtype: np.ndarray
+    """
+    if isinstance(source, (str, Path)):
+        source = _resolve(source)[2]
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    elif isinstance(source, BytesIO):
+        source.seek(0)
+    with Image.open(source) as image:
+        # `convert` copies the image even when it is already in RGB mode
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return np.asarray(image)
+
+
+def crop_image(pixels: np.ndarray, crop: Optional[Crop] = None) -> np.ndarray:
+    """
+    Applies a crop to an image, as an array slice (no copy).
+
+    As with :func:`speculos.client.screenshot_equal`, `right` and `lower` are
+    margins counted from the right and lower edges of the image.
+
+    :param pixels: The image to crop
+    :type pixels: np.ndarray
+    :param crop: The crop to apply. Nothing is done if `None`
+    :type crop: Crop
+
+    :return: A view on the cropped image
+    :rtype: np.ndarray
+    """
+    if crop is None:
+        return pixels
+    height, width = pixels.shape[:2]
+    return pixels[crop.upper : height - crop.lower, crop.left : width - crop.right]
+
+
+def image_digest(pixels: np.ndarray) -> bytes:
+    """
+    Computes a fingerprint of an image: two images have the same digest if and
+    only if they have the same size and the same pixels.
+
+    :param pixels: The image
+    :type pixels: np.ndarray
+
+    :return: The image fingerprint
+    :rtype: bytes
+    """
+    digest = blake2b(repr(pixels.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(pixels).data)
+    return digest.digest()
+
+
+def images_equal(first: np.ndarray, second: np.ndarray) -> bool:
+    """
+    :return: True if both images have the same size and the same pixels
+    :rtype: bool
+    """
+    return first.shape == second.shape and bool(np.array_equal(first, second))
+
+
+def changed_region(first: np.ndarray, second: np.ndarray) -> Optional[Region]:
+    """
+    Computes the bounding box of the pixels which differ between two images.
+
+    :param first: The first image
+    :type first: np.ndarray
+    :param second: The second image
+    :type second: np.ndarray
+
+    :return: The `(left, upper, right, lower)` box of the changed pixels (the
+             whole second image if the sizes differ), or `None` if both images
+             are identical
+    :rtype: Optional[Region]
+    """
+    if first.shape != second.shape:
+        height, width = second.shape[:2]
+        return (0, 0, width, height)
+    changed = first != second
+    if changed.ndim == 3:
+        changed = changed.any(axis=2)
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    columns = np.flatnonzero(changed.any(axis=0))
+    return (int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1)
+
+
+class SnapshotCache:
+    """
+    LRU cache of decoded golden snapshots, bounded by a byte budget.
+    """
+
+    def __init__(self, budget: int = DEFAULT_CACHE_BUDGET):
+        """
+        :param budget: Maximum cumulated size (in bytes) of the cached arrays
+        :type budget: int
+        """
+        self._budget = budget
+        self._size = 0
+        self._entries: "OrderedDict[Tuple, Tuple[np.ndarray, bytes]]" = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def size(self) -> int:
+        """
+        :return: Cumulated size (in bytes) of the cached arrays
+        :rtype: int
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get(self, path: Path, crop: Optional[Crop] = None) -> np.ndarray:
+        """
+        Returns the decoded (and cropped) image stored at `path` (or referenced
+        / packed under this path), decoding it only if it is not cached yet, or
+        if the file changed since.
+
+        :param path: The path of the image file
+        :type path: Path
+        :param crop: Optional crop applied to the image
+        :type crop: Crop
+
+        :raises FileNotFoundError: If the file does not exist, nor is referenced or packed
+
+        :return: The decoded pixels. The array must not be modified.
+        :rtype: np.ndarray
+        """
+        return self._load(path, crop)[0]
+
+    def get_digest(self, path: Path, crop: Optional[Crop] = None) -> bytes:
+        """
+        Returns the fingerprint (see :func:`image_digest`) of the decoded (and
+        cropped) image stored at `path`.
+
+        :param path: The path of the image file
+        :type path: Path
+        :param crop: Optional crop applied to the image
+        :type crop: Crop
+
+        :raises FileNotFoundError: If the file does not exist, nor is referenced or packed
+
+        :return: The image fingerprint
+        :rtype: bytes
+        """
+        return self._load(path, crop)[1]
+
+    def _load(self, path: Path, crop: Optional[Crop]) -> Tuple[np.ndarray, bytes]:
+        identity, stamp, source = _resolve(path)
+        key = (identity, stamp, crop)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        pixels = np.ascontiguousarray(crop_image(decode_image(source), crop))
+        pixels.setflags(write=False)
+        entry = (pixels, image_digest(pixels))
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._size += pixels.nbytes
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        # Always keep the most recent entry, even if it exceeds the budget alone
+        while self._size > self._budget and len(self._entries) > 1:
+            _, (pixels, _) = self._entries.popitem(last=False)
+            self._size -= pixels.nbytes
+
+
+# Shared by every backend of the process, so that a golden used by several
+# tests (or several instances) is decoded only once.
+GOLDEN_CACHE = SnapshotCache()
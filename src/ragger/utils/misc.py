@@ -18,6 +18,7 @@ import toml
 from typing import Optional, Tuple, List
 from pathlib import Path
 from ragger.error import ExceptionRAPDU, MissingElfError
+from ragger.utils.packing import iter_chunks
 import subprocess
 import json
 
@@ -132,7 +133,8 @@ def create_currency_config(
 
 
 def split_message(message: bytes, max_size: int) -> List[bytes]:
-    return [message[x : x + max_size] for x in range(0, len(message), max_size)]
+    # See `iter_chunks` to get the chunks lazily, without copying them
+    return [bytes(chunk) for chunk in iter_chunks(message, max_size)]
 
 
 def get_current_app_name_and_version(backend):
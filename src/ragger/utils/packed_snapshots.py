@@ -0,0 +1,320 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Packed golden snapshots.
+#
+# The golden snapshots of a device (`snapshots/<device>/<test>/00000.png`...)
+# can be packed into a single file next to their directory
+# (`snapshots/<device>.rgpk`), instead of thousands of small files.
+#
+# A pack holds a header, an index giving the offset and size of each image
+# (keyed by its path relative to the device directory), then the PNG images
+# themselves, unchanged (they are already compressed). Packs are memory-mapped:
+# opening one only reads its index, and an image is only read when it is used.
+#
+# A golden missing from the filesystem is looked up in the pack of one of its
+# parent directories. A golden present on the filesystem (for instance just
+# written by a golden run) always takes precedence over a packed one.
+#
+# Packs are built from and expanded into the directory layout with
+# `pack_snapshots` / `unpack_snapshots`, also available from the command line:
+#
+#   python -m ragger.utils.packed_snapshots pack tests/snapshots/nanos
+#   python -m ragger.utils.packed_snapshots unpack tests/snapshots/nanos.rgpk
+import json
+import mmap
+import struct
+from argparse import ArgumentParser
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from ragger.utils.snapshot_blobs import BLOB_INDEX, get_blob_index
+
+PACK_SUFFIX = ".rgpk"
+_MAGIC = b"RGPK"
+_VERSION = 1
+# Magic, version and index size
+_HEADER = struct.Struct("<4sHI")
+
+
+class SnapshotPack:
+    """
+    Read-only, memory-mapped access to a pack of golden snapshots.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        :param path: The pack file
+        :type path: Union[str, Path]
+
+        :raises ValueError: If the file is not a snapshot pack
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as pack_file:
+            stat = self.path.stat()
+            self.stamp = (stat.st_mtime_ns, stat.st_size)
+            self._map = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, index_size = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"'{self.path}' is not a snapshot pack")
+            data_start = _HEADER.size + index_size
+            index = json.loads(self._map[_HEADER.size : data_start])
+        except (struct.error, ValueError):
+            self._map.close()
+            raise
+        self._index: Dict[str, Tuple[int, int]] = {
+            name: (data_start + offset, size) for name, (offset, size) in index.items()
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def names(self) -> List[str]:
+        """
+        :return: The paths of the packed images, relative to the device directory
+        :rtype: List[str]
+        """
+        return sorted(self._index)
+
+    def has_directory(self, name: str) -> bool:
+        """
+        :param name: A directory path, relative to the device directory
+        :type name: str
+
+        :return: True if some packed image is in this directory
+        :rtype: bool
+        """
+        prefix = name.rstrip("/") + "/"
+        return any(entry.startswith(prefix) for entry in self._index)
+
+    def read(self, name: str) -> bytes:
+        """
+        :param name: The path of the image, relative to the device directory
+        :type name: str
+
+        :raises KeyError: If the image is not in the pack
+        :return: The PNG image
+        :rtype: bytes
+        """
+        start, size = self._index[name]
+        return self._map[start : start + size]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def pack_snapshots(directory: Union[str, Path], pack_path: Optional[Path] = None) -> Path:
+    """
+    Packs every PNG image of a snapshot directory (recursively), including the
+    ones referenced from a blob store.
+
+    :param directory: The device snapshot directory (`snapshots/<device>`)
+    :type directory: Union[str, Path]
+    :param pack_path: The pack to write. Defaults to `<directory>.rgpk`
+    :type pack_path: Path
+
+    :return: The pack path
+    :rtype: Path
+    """
+    directory = Path(directory)
+    pack_path = pack_path or directory.with_name(directory.name + PACK_SUFFIX)
+    files = {
+        path.relative_to(directory).as_posix(): path
+        for path in directory.rglob("*.png")
+        if path.is_file()
+    }
+    # Goldens stored in a blob store are packed as well
+    for index_path in directory.rglob(BLOB_INDEX):
+        index = get_blob_index(index_path.parent)
+        for name in index.references():
+            path = index_path.parent / name
+            blob = index.get(name)
+            if not path.is_file() and blob is not None:
+                files[path.relative_to(directory).as_posix()] = blob
+    images = sorted(files.items())
+    index = dict()
+    offset = 0
+    for name, path in images:
+        size = path.stat().st_size
+        index[name] = (offset, size)
+        offset += size
+    encoded_index = json.dumps(index, separators=(",", ":")).encode()
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = pack_path.with_name(f".{pack_path.name}.tmp")
+    with open(temporary, "wb") as pack_file:
+        pack_file.write(_HEADER.pack(_MAGIC, _VERSION, len(encoded_index)))
+        pack_file.write(encoded_index)
+        for _, path in images:
+            pack_file.write(path.read_bytes())
+    temporary.replace(pack_path)
+    return pack_path
+
+
+def unpack_snapshots(pack_path: Union[str, Path], directory: Optional[Path] = None) -> Path:
+    """
+    Writes back every image of a pack into the directory layout.
+
+    :param pack_path: The pack to expand
+    :type pack_path: Union[str, Path]
+    :param directory: Where to write the images. Defaults to the pack path
+                      without its suffix
+    :type directory: Path
+
+    :return: The snapshot directory
+    :rtype: Path
+    """
+    pack_path = Path(pack_path)
+    directory = directory or pack_path.with_suffix("")
+    pack = SnapshotPack(pack_path)
+    try:
+        for name in pack.names():
+            path = directory / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(pack.read(name))
+    finally:
+        pack.close()
+    return directory
+
+
+class _PackRegistry:
+    """
+    Packs opened by the process, and the pack covering each golden directory.
+
+    Packs are only used while the registry lock is held, so that a rebuilt
+    pack can be closed (with its mapping) once reopened.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._packs: Dict[Path, SnapshotPack] = dict()
+        # Golden directory -> (pack path, path of the directory in the pack).
+        # Directories without a pack are not recorded: a pack may be built later.
+        self._locations: Dict[Path, Tuple[Path, str]] = dict()
+
+    def _locate(self, directory: Path) -> Optional[Tuple[Path, str]]:
+        location = self._locations.get(directory)
+        if location is None:
+            for ancestor in (directory, *directory.parents):
+                if not ancestor.name:
+                    break
+                candidate = ancestor.with_name(ancestor.name + PACK_SUFFIX)
+                if candidate.is_file():
+                    location = (candidate, directory.relative_to(ancestor).as_posix())
+                    self._locations[directory] = location
+                    break
+        return location
+
+    def _open(self, pack_path: Path) -> Optional[SnapshotPack]:
+        pack = self._packs.get(pack_path)
+        try:
+            stat = pack_path.stat()
+        except FileNotFoundError:
+            stat = None
+        if pack is not None and (stat is None or pack.stamp != (stat.st_mtime_ns, stat.st_size)):
+            # The pack was removed or rebuilt since it was opened
+            del self._packs[pack_path]
+            pack.close()
+            pack = None
+        if stat is None:
+            return None
+        if pack is None:
+            pack = SnapshotPack(pack_path)
+            self._packs[pack_path] = pack
+        return pack
+
+    def _find(self, directory: Path) -> Optional[Tuple[SnapshotPack, str]]:
+        directory = directory.absolute()
+        location = self._locate(directory)
+        if location is None:
+            return None
+        pack = self._open(location[0])
+        if pack is None:
+            # Look for another pack next time
+            del self._locations[directory]
+            return None
+        return pack, location[1]
+
+    def read(self, path: Path) -> Optional[Tuple[bytes, Tuple]]:
+        with self._lock:
+            found = self._find(path.parent)
+            if found is None:
+                return None
+            pack, directory = found
+            name = path.name if directory == "." else f"{directory}/{path.name}"
+            if name not in pack:
+                return None
+            return pack.read(name), (str(pack.path), *pack.stamp)
+
+    def has_directory(self, directory: Path) -> bool:
+        with self._lock:
+            found = self._find(directory)
+            if found is None:
+                return False
+            pack, name = found
+            return name == "." and len(pack) > 0 or pack.has_directory(name)
+
+
+_PACKS = _PackRegistry()
+
+
+def read_packed(path: Union[str, Path]) -> Optional[Tuple[bytes, Tuple]]:
+    """
+    Looks for a golden in the pack of one of its parent directories.
+
+    :param path: The path the golden would have in the directory layout
+    :type path: Union[str, Path]
+
+    :return: The PNG image and a stamp changing whenever the pack is rebuilt,
+             or `None` if the golden is not packed
+    :rtype: Optional[Tuple[bytes, Tuple]]
+    """
+    return _PACKS.read(Path(path))
+
+
+def is_packed_directory(directory: Union[str, Path]) -> bool:
+    """
+    :param directory: A golden directory, in the directory layout
+    :type directory: Union[str, Path]
+
+    :return: True if a pack holds images of this directory
+    :rtype: bool
+    """
+    return _PACKS.has_directory(Path(directory))
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Converts golden snapshots to and from packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_command = commands.add_parser("pack", help="Pack a device snapshot directory")
+    pack_command.add_argument("directory", type=Path)
+    pack_command.add_argument("--output", type=Path, default=None)
+    unpack_command = commands.add_parser("unpack", help="Expand a pack into directories")
+    unpack_command.add_argument("pack", type=Path)
+    unpack_command.add_argument("--output", type=Path, default=None)
+    arguments = parser.parse_args(args)
+    if arguments.command == "pack":
+        print(pack_snapshots(arguments.directory, arguments.output))
+    else:
+        print(unpack_snapshots(arguments.pack, arguments.output))
+
+
+if __name__ == "__main__":
+    main()
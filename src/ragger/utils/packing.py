@@ -15,7 +15,87 @@ limitations under the License.
 """
 
 from struct import pack
+from typing import Iterator, Optional
 
 
 def pack_APDU(cla: int, ins: int, p1: int = 0, p2: int = 0, data: bytes = b"") -> bytes:
     return pack(">BBBBB", cla, ins, p1, p2, len(data)) + data
+
+
+def iter_chunks(message: bytes, max_size: int) -> Iterator[memoryview]:
+    """
+    Lazily splits a message into chunks of at most `max_size` bytes.
+
+    The chunks are views on the message: nothing is copied.
+
+    :param message: The message to split
+    :type message: bytes
+    :param max_size: The maximum size of a chunk
+    :type max_size: int
+
+    :return: An iterator over the chunks
+    :rtype: Iterator[memoryview]
+    """
+    view = memoryview(message)
+    for offset in range(0, len(view), max_size):
+        yield view[offset : offset + max_size]
+
+
+def chunked_APDUs(
+    cla: int,
+    ins: int,
+    payload: bytes,
+    p1: int = 0,
+    p2: int = 0,
+    p1_next: Optional[int] = None,
+    p2_next: Optional[int] = None,
+    max_size: int = 0xFF,
+    length_prefix_size: int = 0,
+) -> Iterator[bytes]:
+    """
+    Lazily builds the APDUs carrying a payload too big for a single APDU.
+
+    Each APDU is built when requested, from a view on the payload, so that
+    sending a big payload costs a single copy of it. The result can directly
+    be given to :meth:`BackendInterface.exchange_many
+    <ragger.backend.interface.BackendInterface.exchange_many>`.
+
+    :param cla: The application ID
+    :type cla: int
+    :param ins: The command ID
+    :type ins: int
+    :param payload: The payload to send
+    :type payload: bytes
+    :param p1: P1 of the first APDU
+    :type p1: int
+    :param p2: P2 of the first APDU
+    :type p2: int
+    :param p1_next: P1 of the next APDUs, same as the first one by default
+    :type p1_next: int
+    :param p2_next: P2 of the next APDUs, same as the first one by default
+    :type p2_next: int
+    :param max_size: The maximum size of the data of an APDU
+    :type max_size: int
+    :param length_prefix_size: If not 0, the payload is prefixed with its
+                               big-endian length, on this number of bytes
+    :type length_prefix_size: int
+
+    :raises ValueError: If the maximum size cannot hold the length prefix and
+                        at least one payload byte
+
+    :return: An iterator over the APDUs. There is always at least one APDU,
+             even for an empty payload.
+    :rtype: Iterator[bytes]
+    """
+    if not length_prefix_size < max_size <= 0xFF:
+        raise ValueError(
+            f"Invalid APDU data max size {max_size} (length prefix: {length_prefix_size})"
+        )
+    p1_next = p1 if p1_next is None else p1_next
+    p2_next = p2 if p2_next is None else p2_next
+    view = memoryview(payload)
+    prefix = len(view).to_bytes(length_prefix_size, "big") if length_prefix_size else b""
+    first_size = max_size - length_prefix_size
+    yield pack_APDU(cla, ins, p1, p2, prefix + view[:first_size])
+    for chunk in iter_chunks(view[first_size:], max_size):
+        yield pack_APDU(cla, ins, p1_next, p2_next, chunk)
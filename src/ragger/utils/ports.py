@@ -0,0 +1,169 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# TCP port allocation for the Speculos instances.
+#
+# A port found free is only used once Speculos is started, which leaves a window
+# during which another process (typically another pytest-xdist worker) can pick
+# the same port. To close it, allocated ports are recorded into a lease table
+# shared by every process of the user (a JSON file in the temporary directory,
+# private to the user, locked with `flock` while being read and updated). A port
+# is allocated only if it is not leased and can actually be bound. If the table
+# cannot be used, ports are allocated without lease, as a best effort.
+#
+# Leases are released explicitly, and leases held by processes which are not
+# running anymore are dropped whenever the table is updated.
+#
+# Releases can be triggered by the garbage collector (when a backend is
+# collected), hence while the table is already locked by the same thread: as
+# `flock` is not reentrant, they are then postponed to the next table update.
+import fcntl
+import json
+import os
+import socket
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import gettempdir
+from threading import local
+from typing import Dict, Generator, Iterable, List
+
+from ragger.logger import get_default_logger
+
+LEASE_FILE = Path(gettempdir()) / f"ragger-ports-{os.getuid()}.json"
+MAX_PORT = 65535
+
+# Whether the current thread holds the lease table lock
+_LOCKED = local()
+# Ports released while the lease table was locked by the releasing thread
+_POSTPONED_RELEASES: List[int] = list()
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def is_port_free(port: int) -> bool:
+    """
+    :return: True if the port can be bound right now
+    :rtype: bool
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        # Ports in TIME_WAIT can be reused by Speculos, which sets SO_REUSEADDR
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(("", port))
+        except OSError:
+            return False
+    return True
+
+
+@contextmanager
+def _lease_table() -> Generator[Dict[int, int], None, None]:
+    """
+    Locks the lease table and yields it (port -> owner pid), without the
+    leases of dead processes. Modifications are written back on exit.
+    """
+    # Flagged from before the lock is taken until after it is released, so that
+    # a release triggered in between is postponed instead of blocking on it
+    _LOCKED.held = True
+    try:
+        # Never follow a link planted in place of the table
+        fd = os.open(LEASE_FILE, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        with os.fdopen(fd, "r+") as lease_file:
+            fcntl.flock(lease_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    raw = json.loads(lease_file.read() or "{}")
+                except ValueError:
+                    raw = dict()
+                leases = {
+                    int(port): pid for port, pid in raw.items() if _is_process_alive(pid)
+                }
+                yield leases
+                while _POSTPONED_RELEASES:
+                    port = _POSTPONED_RELEASES.pop()
+                    if leases.get(port) == os.getpid():
+                        del leases[port]
+                lease_file.seek(0)
+                lease_file.truncate()
+                json.dump({str(port): pid for port, pid in leases.items()}, lease_file)
+                lease_file.flush()
+            finally:
+                fcntl.flock(lease_file, fcntl.LOCK_UN)
+    finally:
+        _LOCKED.held = False
+
+
+def reserve_port(starting_port: int) -> int:
+    """
+    Finds the first port from `starting_port` which is neither leased nor
+    bound, and leases it to the current process.
+
+    :param starting_port: The first port to consider
+    :type starting_port: int
+
+    :raises RuntimeError: If no port is available
+    :return: The leased port (or only free one, if the table cannot be used)
+    :rtype: int
+    """
+    try:
+        with _lease_table() as leases:
+            for port in range(starting_port, MAX_PORT + 1):
+                if port not in leases and is_port_free(port):
+                    leases[port] = os.getpid()
+                    return port
+    except OSError as error:
+        get_default_logger().warning(
+            "Port lease table '%s' unavailable (%s), allocating without lease",
+            LEASE_FILE,
+            error,
+        )
+        for port in range(starting_port, MAX_PORT + 1):
+            if is_port_free(port):
+                return port
+    raise RuntimeError(f"No free port available from {starting_port}")
+
+
+def release_ports(ports: Iterable[int]) -> None:
+    """
+    Releases ports previously leased by the current process. Ports which are
+    not leased, or leased by another process, are ignored.
+
+    :param ports: The ports to release
+    :type ports: Iterable[int]
+    """
+    ports = list(ports)
+    if not ports:
+        return
+    if getattr(_LOCKED, "held", False):
+        _POSTPONED_RELEASES.extend(ports)
+        return
+    pid = os.getpid()
+    try:
+        with _lease_table() as leases:
+            for port in ports:
+                if leases.get(port) == pid:
+                    del leases[port]
+    except OSError as error:
+        # The ports were allocated without lease, or their leases will be dropped
+        # along with this process
+        get_default_logger().debug("Port lease table unavailable (%s)", error)
@@ -0,0 +1,357 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Content-addressed golden snapshots.
+#
+# Many goldens are identical across tests and devices (home screens, status
+# pages, warnings...). Instead of one copy per test directory, the images can be
+# stored once in a blob store (`snapshots/blobs/<digest>.png`, the digest being
+# a BLAKE2 digest of the PNG file), and referenced by the snapshot directories
+# through an index (`blobs.json`, mapping golden names to digests).
+#
+# A golden missing from the filesystem is looked up in the index of its
+# directory. As the decoded goldens cache (`ragger.utils.images.GOLDEN_CACHE`) is
+# keyed by blob path, a blob referenced by many tests is decoded once.
+#
+# Once a snapshot tree uses a blob store, golden runs keep using it: new goldens
+# are referenced from the index, and a blob is only written when no golden had
+# the same content yet. New references are merged into the index on disk, under
+# a lock on its directory, so that parallel golden runs keep each other's ones.
+#
+# A snapshot tree is moved to / out of a blob store with `migrate_snapshots` /
+# `expand_snapshots`, also available from the command line:
+#
+#   python -m ragger.utils.snapshot_blobs migrate tests/snapshots
+#   python -m ragger.utils.snapshot_blobs expand tests/snapshots
+import fcntl
+import json
+import os
+import shutil
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from hashlib import blake2b
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Generator, List, Optional, Tuple, Union
+
+BLOB_STORE = "blobs"
+BLOB_INDEX = "blobs.json"
+# Name of the snapshot tree root, which holds the blob store
+SNAPSHOTS_ROOT = "snapshots"
+
+
+@contextmanager
+def locked_directory(directory: Path) -> Generator[None, None, None]:
+    """
+    Holds an exclusive lock on a directory, shared with the other processes
+    which update the files it holds (indexes, manifests).
+
+    :param directory: The directory to lock
+    :type directory: Path
+    """
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def blob_digest(content: bytes) -> str:
+    """
+    :param content: An encoded image
+    :type content: bytes
+
+    :return: The digest addressing this content in a blob store
+    :rtype: str
+    """
+    return blake2b(content, digest_size=16).hexdigest()
+
+
+def add_blob(store: Path, content: bytes) -> Tuple[str, bool]:
+    """
+    Stores an image into a blob store, unless it already holds it.
+
+    :param store: The blob store directory
+    :type store: Path
+    :param content: The encoded image
+    :type content: bytes
+
+    :return: The blob digest, and whether the blob was written
+    :rtype: Tuple[str, bool]
+    """
+    digest = blob_digest(content)
+    path = store / f"{digest}.png"
+    if path.is_file():
+        return digest, False
+    store.mkdir(parents=True, exist_ok=True)
+    # Written aside then renamed, so that a reader never sees a partial blob
+    temporary = store / f".{digest}.{os.getpid()}"
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+    return digest, True
+
+
+class BlobIndex:
+    """
+    References of the goldens of a snapshot directory to a blob store.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        :param directory: The snapshot directory
+        :type directory: Path
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / BLOB_INDEX
+        self._lock = Lock()
+        self.stamp, self._store, self._references = self._load()
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    def _load(self) -> Tuple[Optional[int], Optional[str], Dict[str, str]]:
+        try:
+            stamp = self.path.stat().st_mtime_ns
+            content = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None, None, dict()
+        return stamp, content["store"], content["snapshots"]
+
+    @property
+    def store(self) -> Optional[Path]:
+        """
+        :return: The blob store the goldens are referenced from, if any
+        :rtype: Optional[Path]
+        """
+        if self._store is None:
+            return None
+        return Path(os.path.normpath(self.directory / self._store))
+
+    def references(self) -> Dict[str, str]:
+        """
+        :return: The digest of the blob of each golden, by name
+        :rtype: Dict[str, str]
+        """
+        return dict(self._references)
+
+    def get(self, name: str) -> Optional[Path]:
+        """
+        :param name: The golden file name
+        :type name: str
+
+        :return: The blob holding the golden, if it is referenced
+        :rtype: Optional[Path]
+        """
+        digest = self._references.get(name)
+        store = self.store
+        if digest is None or store is None:
+            return None
+        return store / f"{digest}.png"
+
+    def update(self, references: Dict[str, str], store: Path) -> None:
+        """
+        References blobs, then saves the index, along with the references
+        added meanwhile by other processes.
+
+        :param references: The digest of the blob of each golden, by name
+        :type references: Dict[str, str]
+        :param store: The blob store holding the blobs
+        :type store: Path
+        """
+        with self._lock, locked_directory(self.directory):
+            # Start again from the file: parallel golden runs update it as well
+            self.stamp, self._store, self._references = self._load()
+            self._store = os.path.relpath(store, self.directory)
+            self._references.update(references)
+            temporary = self.path.with_name(f".{BLOB_INDEX}.{os.getpid()}")
+            content = {"store": self._store, "snapshots": self._references}
+            temporary.write_text(json.dumps(content, indent=1, sort_keys=True) + "\n")
+            os.replace(temporary, self.path)
+            self.stamp = self.path.stat().st_mtime_ns
+
+
+_INDEXES: Dict[Path, BlobIndex] = dict()
+_INDEXES_LOCK = Lock()
+
+
+def get_blob_index(directory: Path) -> BlobIndex:
+    """
+    Returns the blob index of a snapshot directory, loaded once per process (and
+    reloaded if the file changes).
+
+    :param directory: The snapshot directory
+    :type directory: Path
+
+    :return: The index (empty if the directory has none)
+    :rtype: BlobIndex
+    """
+    directory = Path(directory)
+    try:
+        stamp: Optional[int] = (directory / BLOB_INDEX).stat().st_mtime_ns
+    except FileNotFoundError:
+        stamp = None
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(directory)
+        if index is None or index.stamp != stamp:
+            index = BlobIndex(directory)
+            _INDEXES[directory] = index
+        return index
+
+
+def resolve_blob(path: Union[str, Path]) -> Optional[Path]:
+    """
+    :param path: The path of a golden, in the directory layout
+    :type path: Union[str, Path]
+
+    :return: The blob holding the golden, if its directory references one
+    :rtype: Optional[Path]
+    """
+    path = Path(path)
+    return get_blob_index(path.parent).get(path.name)
+
+
+def golden_file(path: Union[str, Path]) -> Path:
+    """
+    :param path: The path of a golden, in the directory layout
+    :type path: Union[str, Path]
+
+    :return: The file holding the golden: the path itself, or the blob it
+             references
+    :rtype: Path
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    return resolve_blob(path) or path
+
+
+def find_blob_store(directory: Path) -> Optional[Path]:
+    """
+    :param directory: A snapshot directory
+    :type directory: Path
+
+    :return: The blob store of the snapshot tree holding the directory, if it
+             uses one
+    :rtype: Optional[Path]
+    """
+    directory = Path(directory)
+    store = get_blob_index(directory).store
+    if store is not None:
+        return store
+    for ancestor in (directory, *directory.parents):
+        if ancestor.name == SNAPSHOTS_ROOT and (ancestor / BLOB_STORE).is_dir():
+            return ancestor / BLOB_STORE
+    return None
+
+
+def write_golden(path: Union[str, Path], content: bytes) -> None:
+    """
+    Writes a golden: into the blob store of its snapshot tree if it uses one,
+    as a plain file otherwise.
+
+    :param path: The path of the golden, in the directory layout
+    :type path: Union[str, Path]
+    :param content: The encoded image
+    :type content: bytes
+    """
+    path = Path(path)
+    store = find_blob_store(path.parent)
+    if store is None:
+        path.write_bytes(content)
+        return
+    digest, _ = add_blob(store, content)
+    get_blob_index(path.parent).update({path.name: digest}, store)
+    # A plain file would take precedence over the blob
+    if path.exists():
+        path.unlink()
+
+
+def migrate_snapshots(directory: Union[str, Path]) -> Tuple[int, int]:
+    """
+    Moves every golden of a snapshot tree into its blob store
+    (`<directory>/blobs`), replacing them with references.
+
+    :param directory: The snapshot tree root (`snapshots`)
+    :type directory: Union[str, Path]
+
+    :return: The number of migrated goldens, and of blobs written
+    :rtype: Tuple[int, int]
+    """
+    directory = Path(directory)
+    store = directory / BLOB_STORE
+    store.mkdir(exist_ok=True)
+    goldens: Dict[Path, List[Path]] = dict()
+    for path in sorted(directory.rglob("*.png")):
+        if store not in path.parents and path.is_file():
+            goldens.setdefault(path.parent, list()).append(path)
+    migrated = written = 0
+    for snapshot_dir, paths in goldens.items():
+        references = dict()
+        for path in paths:
+            digest, new = add_blob(store, path.read_bytes())
+            references[path.name] = digest
+            written += new
+        get_blob_index(snapshot_dir).update(references, store)
+        for path in paths:
+            path.unlink()
+        migrated += len(paths)
+    return migrated, written
+
+
+def expand_snapshots(directory: Union[str, Path]) -> int:
+    """
+    Writes back every golden referenced in a snapshot tree as a plain file, then
+    removes the indexes and the blob store.
+
+    :param directory: The snapshot tree root (`snapshots`)
+    :type directory: Union[str, Path]
+
+    :return: The number of expanded goldens
+    :rtype: int
+    """
+    directory = Path(directory)
+    expanded = 0
+    for index_path in sorted(directory.rglob(BLOB_INDEX)):
+        index = get_blob_index(index_path.parent)
+        for name in index.references():
+            blob = index.get(name)
+            assert blob is not None
+            shutil.copyfile(blob, index_path.parent / name)
+            expanded += 1
+        index_path.unlink()
+    shutil.rmtree(directory / BLOB_STORE, ignore_errors=True)
+    return expanded
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Moves golden snapshots to and from a blob store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_command = commands.add_parser("migrate", help="Move the goldens into a blob store")
+    migrate_command.add_argument("directory", type=Path)
+    expand_command = commands.add_parser("expand", help="Write the goldens back as files")
+    expand_command.add_argument("directory", type=Path)
+    arguments = parser.parse_args(args)
+    if arguments.command == "migrate":
+        migrated, written = migrate_snapshots(arguments.directory)
+        print(f"{migrated} goldens stored as {written} new blobs")
+    else:
+        print(f"{expand_snapshots(arguments.directory)} goldens expanded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Copyright 2026 Ledger SAS
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Golden snapshots storage.
+#
+# A snapshot directory can hold a manifest (`digests.json`) giving, for each
+# golden image, the fingerprint of its decoded pixels (see
+# `ragger.utils.images.image_digest`), whole and for the crops it was compared
+# with. A screen can then be checked against a golden by comparing digests,
+# without reading nor decoding the golden image. The golden is only decoded when
+# the digests differ (or are unknown), to confirm the mismatch.
+#
+# Manifest entries also hold the size and a digest of the encoded file, so that
+# an entry is ignored once its golden is modified by other means than a golden
+# run. Modification times differ from one checkout to another, and are not
+# stored: a golden is read (but not decoded) the first time it is looked up in
+# a process, then trusted as long as it keeps the size and modification time it
+# had then. Goldens stored in a blob store (see `ragger.utils.snapshot_blobs`)
+# are checked through the blob they reference.
+#
+# Manifests are reloaded when their file changes, and each golden recorded is
+# merged into the manifest on disk, under a lock on its directory, so that
+# parallel golden runs do not drop each other's entries.
+import json
+import os
+from hashlib import blake2b
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ragger.utils.images import crop_image, image_digest
+from ragger.utils.snapshot_blobs import golden_file, locked_directory
+from ragger.utils.structs import Crop
+
+MANIFEST_NAME = "digests.json"
+
+
+def _file_digest(path: Path) -> str:
+    return blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+def _crop_key(crop: Optional[Crop]) -> str:
+    if crop is None:
+        return ""
+    return f"{crop.left},{crop.upper},{crop.right},{crop.lower}"
+
+
+class SnapshotManifest:
+    """
+    Digests of the decoded golden images of a snapshot directory.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        :param directory: The snapshot directory
+        :type directory: Path
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_NAME
+        self._lock = Lock()
+        # Goldens whose content matched their entry in this process, by name, with
+        # the size and modification time they had then, and the file digest matched
+        self._verified: Dict[str, Tuple[int, int, str]] = dict()
+        self.stamp, self._entries = self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> Tuple[Optional[int], Dict[str, dict]]:
+        try:
+            stamp = self.path.stat().st_mtime_ns
+            return stamp, json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None, dict()
+
+    def _is_fresh(self, name: str, entry: dict) -> bool:
+        path = golden_file(self.directory / name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry["size"]:
+            return False
+        verified = (stat.st_size, stat.st_mtime_ns, entry["file"])
+        if self._verified.get(name) == verified:
+            return True
+        if _file_digest(path) != entry["file"]:
+            return False
+        self._verified[name] = verified
+        return True
+
+    def digest(self, name: str, crop: Optional[Crop] = None) -> Optional[bytes]:
+        """
+        :param name: The golden file name
+        :type name: str
+        :param crop: The crop applied to the golden
+        :type crop: Crop
+
+        :return: The fingerprint of the (cropped) golden, if it is known and the
+                 golden did not change since it was computed
+        :rtype: Optional[bytes]
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or _crop_key(crop) not in entry["pixels"]:
+                return None
+            if not self._is_fresh(name, entry):
+                return None
+            return bytes.fromhex(entry["pixels"][_crop_key(crop)])
+
+    def record(self, name: str, pixels: np.ndarray, crop: Optional[Crop] = None) -> None:
+        """
+        Records the digests of a golden which was just written, then saves the
+        manifest, along with the entries recorded meanwhile by other processes.
+
+        :param name: The golden file name
+        :type name: str
+        :param pixels: The decoded golden
+        :type pixels: np.ndarray
+        :param crop: A crop the golden is compared with, whose digest is also
+                     recorded
+        :type crop: Crop
+        """
+        path = golden_file(self.directory / name)
+        file_digest = _file_digest(path)
+        stat = path.stat()
+        with self._lock, locked_directory(self.directory):
+            # Start again from the file: parallel golden runs update it as well
+            self.stamp, self._entries = self._load()
+            entry = self._entries.get(name)
+            if entry is None or entry["file"] != file_digest:
+                entry = {"file": file_digest, "pixels": {}}
+                self._entries[name] = entry
+            entry["size"] = stat.st_size
+            entry["pixels"][""] = image_digest(pixels).hex()
+            if crop is not None:
+                entry["pixels"][_crop_key(crop)] = image_digest(
+                    crop_image(pixels, crop)
+                ).hex()
+            self._verified[name] = (stat.st_size, stat.st_mtime_ns, file_digest)
+            self._save()
+
+    def _save(self) -> None:
+        # Written aside then renamed, so that a reader never sees a partial file
+        temporary = self.path.with_name(f".{MANIFEST_NAME}.{os.getpid()}")
+        temporary.write_text(json.dumps(self._entries, indent=1, sort_keys=True) + "\n")
+        os.replace(temporary, self.path)
+        self.stamp = self.path.stat().st_mtime_ns
+
+
+_MANIFESTS: Dict[Path, SnapshotManifest] = dict()
+_MANIFESTS_LOCK = Lock()
+
+
+def get_manifest(directory: Path) -> SnapshotManifest:
+    """
+    Returns the manifest of a snapshot directory, loaded once per process (and
+    reloaded if the file changes).
+
+    :param directory: The snapshot directory
+    :type directory: Path
+
+    :return: The manifest (empty if the directory has none yet)
+    :rtype: SnapshotManifest
+    """
+    directory = Path(directory)
+    try:
+        stamp: Optional[int] = (directory / MANIFEST_NAME).stat().st_mtime_ns
+    except FileNotFoundError:
+        stamp = None
+    with _MANIFESTS_LOCK:
+        manifest = _MANIFESTS.get(directory)
+        if manifest is None or manifest.stamp != stamp:
+            reloaded = SnapshotManifest(directory)
+            if manifest is not None:
+                # Goldens already verified against an entry stay trusted while it holds
+                reloaded._verified.update(manifest._verified)
+            manifest = reloaded
+            _MANIFESTS[directory] = manifest
+        return manifest
@@ -0,0 +1,71 @@
+import asyncio
+from ledgered.devices import Devices, DeviceType
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from ragger.backend import AsyncSpeculosBackend, RaisePolicy
+from ragger.error import ExceptionRAPDU
+
+from tests.stubs import SpeculosServerStub, EndPoint, APDUStatus
+
+
+class TestbackendAsyncSpeculos(IsolatedAsyncioTestCase):
+    """
+    Same patterns as `TestbackendSpeculos`, with the backend driven from an
+    event loop.
+    """
+
+    def setUp(self):
+        self.device = Devices.get_by_type(DeviceType.NANOS)
+        self.backend = AsyncSpeculosBackend("some app", self.device)
+
+    async def test_aexchange_raw(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                async with self.backend:
+                    rapdu = await self.backend.aexchange_raw(bytes.fromhex("00000000"))
+                    self.assertEqual(rapdu.status, APDUStatus.SUCCESS)
+                    self.assertEqual(rapdu.data, bytes.fromhex(EndPoint.APDU))
+
+    async def test_aexchange_raises(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                async with self.backend:
+                    with self.assertRaises(ExceptionRAPDU) as error:
+                        await self.backend.aexchange(0x01, 0x00)
+                    self.assertEqual(error.exception.status, APDUStatus.ERROR)
+                    self.backend.raise_policy = RaisePolicy.RAISE_NOTHING
+                    rapdu = await self.backend.aexchange(0x01, 0x00)
+                    self.assertEqual(rapdu.status, APDUStatus.ERROR)
+
+    async def test_aexchange_concurrent(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                async with self.backend:
+                    rapdus = await asyncio.gather(
+                        *(self.backend.aexchange(0x00, index) for index in range(8))
+                    )
+                    for rapdu in rapdus:
+                        self.assertEqual(rapdu.status, APDUStatus.SUCCESS)
+
+    async def test_aexchange_async(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                async with self.backend:
+                    async with self.backend.aexchange_async(0x00, 0x00):
+                        pass
+                    self.assertEqual(
+                        self.backend.last_async_response.data,
+                        bytes.fromhex(EndPoint.APDU),
+                    )
+
+    async def test_await_screen_change(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                async with self.backend:
+                    home = self.backend._last_screenshot_digest
+                    self.backend.right_click()
+                    await self.backend.await_screen_change(1)
+                    self.assertNotEqual(self.backend._last_screenshot_digest, home)
+                    with self.assertRaises(TimeoutError):
+                        await self.backend.await_screen_change(0.3)
@@ -92,6 +92,46 @@ class TestNavigator(TestCase):
                     self.assertIn("Screen does not match golden", str(error.exception))
                     self.assertIn("00001.png", str(error.exception))
 
+    def test_navigate_and_compare_deferred(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                with self.backend:
+                    instructions = [
+                        NavIns(NavInsID.RIGHT_CLICK),
+                        NavIns(NavInsID.RIGHT_CLICK),
+                        NavIns(NavInsID.LEFT_CLICK),
+                        NavIns(NavInsID.RIGHT_CLICK),
+                        NavIns(NavInsID.BOTH_CLICK),
+                        NavIns(NavInsID.RIGHT_CLICK),
+                        NavIns(NavInsID.BOTH_CLICK),
+                        NavIns(NavInsID.WAIT, (2,)),
+                    ]
+                    self.navigator.navigate_and_compare(
+                        ROOT_SCREENSHOT_PATH,
+                        "test_navigate_and_compare",
+                        instructions,
+                        screen_change_before_first_instruction=False,
+                        screen_change_after_last_instruction=False,
+                        deferred_compare=True,
+                    )
+
+    def test_navigate_and_compare_deferred_wrong_golden(self):
+        with patch("speculos.client.subprocess"):
+            with SpeculosServerStub():
+                with self.backend:
+                    instructions = [NavIns(NavInsID.RIGHT_CLICK)]
+                    with self.assertRaises(AssertionError) as error:
+                        self.navigator.navigate_and_compare(
+                            ROOT_SCREENSHOT_PATH,
+                            "test_navigate_and_compare_wrong_golden",
+                            instructions,
+                            screen_change_before_first_instruction=False,
+                            deferred_compare=True,
+                        )
+                    self.assertIn("Screens do not match goldens", str(error.exception))
+                    self.assertNotIn("00000.png", str(error.exception))
+                    self.assertIn("00001.png", str(error.exception))
+
     def test_navigate_until_snap(self):
         with patch("speculos.client.subprocess"):
             with SpeculosServerStub():
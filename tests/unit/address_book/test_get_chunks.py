@@ -77,3 +77,7 @@ class TestGetChunksFraming(TestCase):
         apdus = _Dummy(b"x").get_chunks(cla=0xE0, ins=0x99)
         self.assertEqual(0xE0, apdus[0][0])
         self.assertEqual(0x99, apdus[0][1])
+
+    def test_iter_chunks_matches_get_chunks(self):
+        command = _Dummy(bytes(i % 256 for i in range(600)))
+        self.assertEqual(command.get_chunks(), list(command.iter_chunks()))
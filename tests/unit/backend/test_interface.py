@@ -3,11 +3,12 @@ import tempfile
 from ledgered.devices import DeviceType, Devices
 from pathlib import Path
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from ragger.error import ExceptionRAPDU
 from ragger.backend import BackendInterface
 from ragger.backend import RaisePolicy
+from ragger.utils import RAPDU
 
 
 class DummyBackend(BackendInterface):
@@ -127,6 +128,41 @@ class TestBackendInterface(TestCase):
         self.assertTrue(self.backend.mock.exchange_async_raw.called)
         self.assertEqual(self.backend.mock.exchange_async_raw.call_args, ((expected,),))
 
+    def test_exchange_many(self):
+        apdus = [b"\x00\x01", b"\x00\x02", b"\x00\x03"]
+        self.backend.mock.exchange_raw.side_effect = [
+            RAPDU(0x9000, b"\x01"),
+            ExceptionRAPDU(0x6E00, b"\x02"),
+            RAPDU(0x9000, b"\x03"),
+        ]
+        self.assertEqual(
+            self.backend.exchange_many(apdus, stop_on_error=False),
+            [RAPDU(0x9000, b"\x01"), RAPDU(0x6E00, b"\x02"), RAPDU(0x9000, b"\x03")],
+        )
+        self.assertEqual(
+            [call.args[0] for call in self.backend.mock.exchange_raw.call_args_list],
+            apdus,
+        )
+
+    def test_exchange_many_stop_on_error(self):
+        self.backend.mock.exchange_raw.side_effect = [
+            RAPDU(0x9000, b""),
+            ExceptionRAPDU(0x6E00, b""),
+        ]
+        with self.assertRaises(ExceptionRAPDU):
+            self.backend.exchange_many([b"\x00", b"\x01", b"\x02"])
+        self.assertEqual(self.backend.mock.exchange_raw.call_count, 2)
+
+    def test_send_ticks(self):
+        with patch.object(self.backend, "send_tick") as send_tick:
+            self.backend.send_ticks(3)
+        self.assertEqual(send_tick.call_count, 3)
+
+    def test_screen_reference_default(self):
+        reference = self.backend.capture_reference()
+        self.assertIsNone(reference)
+        self.assertTrue(self.backend.screen_differs_from(reference))
+
 
 class TestBackendInterfaceLogging(TestCase):
     def test_log_apdu(self):
@@ -1,10 +1,25 @@
+import importlib
+import socket
+import sys
 from io import BytesIO
 from ledgered.devices import DeviceType, Devices
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from speculos.client import ClientException
+from threading import Event, Thread
+from time import sleep
 from typing import List
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
-from ragger.backend import SpeculosBackend
+import ragger
+from ragger.backend import RaisePolicy, SpeculosBackend
+from ragger.backend.speculos import _RawApduSocket, _ScreenEventListener
+from ragger.error import ExceptionRAPDU
+from ragger.utils import RAPDU, Crop, ports
+from ragger.utils.images import decode_image, image_digest
+
+from ..helpers import make_png, temporary_directory
 
 APPNAME = "some app"
 
@@ -51,7 +66,7 @@ class TestSpeculosBackend(TestCase):
             SpeculosBackend(APPNAME, self.nanos, args="not a list")
 
     def test_context_manager(self):
-        expected_image = b"1234"
+        expected_image = make_png()
         with patch("ragger.backend.speculos.SpeculosClient"):
             backend = SpeculosBackend(APPNAME, self.nanos)
         self.assertIsNone(backend._last_screenshot)
@@ -67,6 +82,13 @@ class TestSpeculosBackend(TestCase):
             self.assertEqual(
                 backend._last_screenshot.getvalue(), BytesIO(expected_image).getvalue()
             )
+            self.assertEqual(
+                backend._last_screenshot_digest,
+                image_digest(decode_image(expected_image)),
+            )
+            self.assertEqual(
+                backend._last_screenshot_digest, backend._home_screenshot_digest
+            )
             self.assertFalse(backend._client.__exit__.called)
         self.assertTrue(backend._client.__exit__.called)
 
@@ -138,3 +160,568 @@ class TestSpeculosBackend(TestCase):
             self.assertEqual(len(client_priv_keys), client_number)
             # all attestations are different
             self.assertEqual(len(client_attestations), client_number)
+
+    def test_screen_event_listener(self):
+        client = MagicMock()
+        client.get_next_event.side_effect = [{"text": "Boilerplate"}, ClientException()]
+        listener = _ScreenEventListener(client)
+        self.assertFalse(listener.screen_updated.is_set())
+        listener.run()
+        self.assertTrue(listener.screen_updated.is_set())
+        self.assertEqual(client.get_next_event.call_count, 2)
+
+    def test_wait_for_screen_change_from_events(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, use_screen_events=True)
+        home, other = make_png(), make_png(color=(255, 255, 255))
+        backend._last_screenshot = BytesIO(home)
+        backend._last_screenshot_digest = image_digest(decode_image(home))
+        backend._screen_events = MagicMock(screen_updated=Event())
+        backend._client.get_screenshot.side_effect = [home, other]
+        # first tick updates the display, second one lets it settle
+        ticks = iter([True, False])
+
+        def tick(action):
+            if next(ticks):
+                backend._screen_events.screen_updated.set()
+
+        backend._client.ticker_ctl.side_effect = tick
+        backend.wait_for_screen_change(1)
+        self.assertEqual(backend._client.ticker_ctl.call_count, 2)
+        self.assertEqual(backend._client.get_screenshot.call_count, 2)
+        self.assertEqual(backend._last_screenshot.getvalue(), other)
+
+    def test_wait_for_screen_change_from_events_never_settled(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, use_screen_events=True)
+        home, other = make_png(), make_png(color=(255, 255, 255))
+        backend._last_screenshot = BytesIO(home)
+        backend._last_screenshot_digest = image_digest(decode_image(home))
+        backend._screen_events = MagicMock(screen_updated=Event())
+        backend._client.get_screenshot.side_effect = [home, other]
+        # every tick updates the display (spinner...)
+        backend._client.ticker_ctl.side_effect = (
+            lambda action: backend._screen_events.screen_updated.set()
+        )
+        backend.wait_for_screen_change(1)
+        # the screen is compared anyway once the skips are exhausted
+        self.assertEqual(
+            backend._client.ticker_ctl.call_count, SpeculosBackend._SCREEN_EVENT_MAX_SKIPS + 1
+        )
+        self.assertEqual(backend._client.get_screenshot.call_count, 2)
+        self.assertEqual(backend._last_screenshot.getvalue(), other)
+
+    def test_wait_for_screen_change_from_events_timeout(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, use_screen_events=True)
+        home = make_png()
+        backend._last_screenshot = BytesIO(home)
+        backend._last_screenshot_digest = image_digest(decode_image(home))
+        backend._screen_events = MagicMock(screen_updated=Event())
+        backend._client.get_screenshot.return_value = home
+        with self.assertRaises(TimeoutError):
+            backend.wait_for_screen_change(2)
+        # No display update notified: the screen is compared after every tick
+        self.assertEqual(backend._client.ticker_ctl.call_count, 20)
+        self.assertEqual(backend._client.get_screenshot.call_count, 21)
+
+    def test_restore_checkpoint_joins_screen_event_listener(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, use_screen_events=True)
+        stream_closed = Event()
+        backend._client.get_next_event.side_effect = lambda: stream_closed.wait() or {}
+        backend._client.stop.side_effect = stream_closed.set
+        old_listener = _ScreenEventListener(backend._client)
+        old_listener.start()
+        backend._screen_events = old_listener
+        with patch.object(backend, "_start") as start:
+            start.side_effect = lambda: self.assertFalse(old_listener.is_alive())
+            backend.restore_checkpoint()
+        start.assert_called_once()
+        self.assertIsNone(backend._screen_events)
+
+    def test_wait_for_home_screen_compares_fingerprints(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        home, other = make_png(), make_png(color=(255, 255, 255))
+        backend._home_screenshot_digest = image_digest(decode_image(home))
+        backend._last_screenshot_digest = image_digest(decode_image(other))
+        backend._client.get_screenshot.side_effect = [other, home]
+        backend.wait_for_home_screen(1)
+        self.assertEqual(backend._client.get_screenshot.call_count, 2)
+        self.assertEqual(
+            backend._last_screenshot_digest, backend._home_screenshot_digest
+        )
+        # Already on the home screen: no screenshot needed
+        backend.wait_for_home_screen(1)
+        self.assertEqual(backend._client.get_screenshot.call_count, 2)
+
+    def test_compare_screen_with_snapshot(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        with temporary_directory() as dir_path:
+            golden = dir_path / "golden.png"
+            golden.write_bytes(make_png())
+            backend._client.get_screenshot.return_value = make_png()
+            self.assertTrue(backend.compare_screen_with_snapshot(golden))
+            backend._client.get_screenshot.return_value = make_png(color=(0, 0, 1))
+            self.assertFalse(backend.compare_screen_with_snapshot(golden))
+            self.assertFalse(backend.compare_screen_with_snapshot(golden, Crop(lower=1)))
+
+    def test_compare_screen_with_snapshot_manifest(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, golden_manifests=True)
+        backend._client.get_screenshot.return_value = make_png()
+        with temporary_directory() as dir_path:
+            golden = dir_path / "golden.png"
+            self.assertTrue(
+                backend.compare_screen_with_snapshot(golden, Crop(lower=1), golden_run=True)
+            )
+            self.assertTrue((dir_path / "digests.json").is_file())
+            with patch("ragger.backend.speculos.GOLDEN_CACHE") as cache:
+                self.assertTrue(backend.compare_screen_with_snapshot(golden))
+                self.assertTrue(backend.compare_screen_with_snapshot(golden, Crop(lower=1)))
+                # A mismatch is confirmed on the golden itself
+                backend._client.get_screenshot.return_value = make_png(color=(0, 0, 1))
+                cache.get_digest.return_value = b""
+                self.assertFalse(backend.compare_screen_with_snapshot(golden))
+            self.assertEqual(cache.get_digest.call_count, 1)
+
+    def test_compare_screen_with_snapshot_manifests_disabled(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        backend._client.get_screenshot.return_value = make_png()
+        with temporary_directory() as dir_path:
+            golden = dir_path / "golden.png"
+            with patch("ragger.backend.speculos.get_manifest") as get_manifest:
+                self.assertTrue(backend.compare_screen_with_snapshot(golden, golden_run=True))
+                self.assertTrue(backend.compare_screen_with_snapshot(golden))
+            get_manifest.assert_not_called()
+            self.assertFalse((dir_path / "digests.json").exists())
+
+    def test_screen_reference(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        image = Image.new("RGB", (8, 6))
+        image.putpixel((5, 5), (255, 255, 255))
+        iobytes = BytesIO()
+        image.save(iobytes, format="PNG")
+        backend._client.get_screenshot.side_effect = [make_png()] * 2 + [
+            iobytes.getvalue()
+        ] * 3
+        reference = backend.capture_reference()
+        self.assertFalse(backend.screen_differs_from(reference))
+        self.assertTrue(backend.screen_differs_from(reference))
+        self.assertFalse(backend.screen_differs_from(reference, Crop(lower=1)))
+        # the screen kept by the last screen change is compared without a new capture
+        backend.wait_for_screen_change(1)
+        self.assertTrue(backend.last_screen_differs_from(reference))
+        self.assertFalse(backend.last_screen_differs_from(reference, Crop(lower=1)))
+        self.assertEqual(backend._client.get_screenshot.call_count, 5)
+
+    def test_compare_screen_with_snapshot_saves_served_png(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        screenshot = make_png(color=(0, 0, 1))
+        backend._client.get_screenshot.return_value = screenshot
+        with temporary_directory() as dir_path:
+            golden, tmp = dir_path / "golden.png", dir_path / "tmp.png"
+            self.assertTrue(
+                backend.compare_screen_with_snapshot(
+                    golden, tmp_snap_path=tmp, golden_run=True
+                )
+            )
+            self.assertEqual(golden.read_bytes(), screenshot)
+            self.assertEqual(tmp.read_bytes(), screenshot)
+
+    def test_compare_screen_with_snapshot_blob_store(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, golden_manifests=True)
+        backend._client.get_screenshot.return_value = make_png()
+        with temporary_directory() as dir_path:
+            store = dir_path / "snapshots" / "blobs"
+            store.mkdir(parents=True)
+            goldens = [dir_path / "snapshots" / "nanos" / name / "00000.png" for name in "ab"]
+            for golden in goldens:
+                golden.parent.mkdir(parents=True)
+                self.assertTrue(backend.compare_screen_with_snapshot(golden, golden_run=True))
+                self.assertFalse(golden.exists())
+            self.assertEqual(len(list(store.iterdir())), 1)
+            for golden in goldens:
+                self.assertTrue(backend.compare_screen_with_snapshot(golden))
+            backend._client.get_screenshot.return_value = make_png(color=(0, 0, 1))
+            self.assertFalse(backend.compare_screen_with_snapshot(goldens[0]))
+
+    def test_reset(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        home = make_png()
+        backend._home_screenshot_digest = image_digest(decode_image(home))
+        backend._last_screenshot_digest = backend._home_screenshot_digest
+        backend.raise_policy = RaisePolicy.RAISE_NOTHING
+        backend.whitelisted_status = (0x6E00,)
+        backend._pending = MagicMock()
+        backend._ticker_paused_count = 2
+        # The last reference is the home screen, but the actual screen is not
+        backend._client.get_screenshot.side_effect = [
+            make_png(color=(255, 255, 255)),
+            home,
+        ]
+        backend.reset(1)
+        self.assertEqual(backend.raise_policy, RaisePolicy.RAISE_ALL_BUT_0x9000)
+        self.assertEqual(backend.whitelisted_status, ())
+        self.assertIsNone(backend._pending)
+        self.assertEqual(backend._ticker_paused_count, 0)
+        backend._client.ticker_ctl.assert_any_call("resume")
+        self.assertEqual(backend._client.get_screenshot.call_count, 2)
+
+    def test_reset_not_on_home_screen(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        backend._home_screenshot_digest = image_digest(decode_image(make_png()))
+        backend._client.get_screenshot.return_value = make_png(color=(255, 255, 255))
+        with self.assertRaises(TimeoutError):
+            backend.reset(0.2)
+
+    def test_restore_checkpoint(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        home = make_png()
+        backend._client.get_screenshot.return_value = home
+        backend._retrieve_client_screen_content = lambda: {"events": True}
+        with backend:
+            backend.raise_policy = RaisePolicy.RAISE_NOTHING
+            backend._pending = MagicMock()
+            backend._ticker_paused_count = 1
+            backend._last_screenshot_digest = None
+            backend.restore_checkpoint()
+            backend._client.stop.assert_called_once()
+            self.assertEqual(backend._client.__enter__.call_count, 2)
+            self.assertEqual(backend.raise_policy, RaisePolicy.RAISE_ALL_BUT_0x9000)
+            self.assertIsNone(backend._pending)
+            self.assertEqual(backend._ticker_paused_count, 0)
+            self.assertEqual(
+                backend._last_screenshot_digest, image_digest(decode_image(home))
+            )
+            self.assertEqual(
+                backend._last_screenshot_digest, backend._home_screenshot_digest
+            )
+
+    def test_ports_leases_released_on_exit(self):
+        with temporary_directory() as dir_path:
+            with patch.object(ports, "LEASE_FILE", dir_path / "ports.json"):
+                with patch("ragger.backend.speculos.SpeculosClient"):
+                    first = SpeculosBackend(APPNAME, self.nanos)
+                    # ports leased by the first instance are not allocated again
+                    second = SpeculosBackend(APPNAME, self.nanos)
+                self.assertEqual(first._leased_ports, [first._api_port, first._apdu_port])
+                self.assertNotIn(second._api_port, first._leased_ports)
+                self.assertNotIn(second._apdu_port, first._leased_ports)
+                first.__exit__(None, None, None)
+                with patch("ragger.backend.speculos.SpeculosClient"):
+                    third = SpeculosBackend(APPNAME, self.nanos)
+                self.assertEqual(third._api_port, first._api_port)
+
+    def test_batch_start(self):
+        def make_client(*args, **kwargs):
+            client = MagicMock()
+            client.get_screenshot.return_value = make_png()
+            return client
+
+        with patch("ragger.backend.speculos.SpeculosClient", side_effect=make_client):
+            with patch.object(
+                SpeculosBackend,
+                "_retrieve_client_screen_content",
+                return_value={"events": True},
+            ):
+                clients = SpeculosBackend.batch(
+                    APPNAME, self.nanos, 3, start=True, max_workers=2
+                )
+        self.assertEqual(len(clients), 3)
+        for client in clients:
+            self.assertEqual(client._client.__enter__.call_count, 1)
+            self.assertIsNotNone(client.boot_time)
+            self.assertIsNotNone(client._home_screenshot_digest)
+            self.assertFalse(client._client.__exit__.called)
+
+    def test_batch_start_empty_and_invalid_workers(self):
+        self.assertEqual(SpeculosBackend.batch(APPNAME, self.nanos, 0, start=True), [])
+        with self.assertRaises(ValueError):
+            SpeculosBackend.batch(APPNAME, self.nanos, 1, start=True, max_workers=0)
+
+    def test_batch_start_failure_stops_all_instances(self):
+        with patch(
+            "ragger.backend.speculos.SpeculosClient",
+            side_effect=lambda *args, **kwargs: MagicMock(),
+        ):
+            clients = SpeculosBackend.batch(APPNAME, self.nanos, 3)
+        for client in clients:
+            client._client.get_screenshot.return_value = make_png()
+            client._retrieve_client_screen_content = lambda: {"events": True}
+        clients[1]._client.__enter__.side_effect = RuntimeError("boot failed")
+        with self.assertRaises(RuntimeError):
+            SpeculosBackend._start_batch(clients, max_workers=None)
+        for client in clients:
+            self.assertEqual(client._client.__exit__.call_count, 1)
+
+    def test_boot_polling_backoff_and_timings(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, boot_poll_floor=0.02)
+        backend._client.get_screenshot.return_value = make_png()
+        contents = [{"events": []}] * 5 + [{"events": [{"text": "Boilerplate"}]}]
+        backend._retrieve_client_screen_content = MagicMock(side_effect=contents)
+        with patch("ragger.backend.speculos.sleep") as patched_sleep:
+            with backend:
+                delays = [call.args[0] for call in patched_sleep.call_args_list]
+                self.assertEqual(delays, [0.02, 0.04, 0.08, 0.1, 0.1])
+                self.assertEqual(
+                    list(backend.boot_timings), ["api", "display", "screenshot"]
+                )
+                self.assertAlmostEqual(
+                    backend.boot_time, sum(backend.boot_timings.values()), places=3
+                )
+
+    def test_boot_display_timeout_excludes_launch(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        backend._BOOT_DISPLAY_TIMEOUT = 0.2
+        backend._client.get_screenshot.return_value = make_png()
+        # Slow launch, then the application displays something right away
+        backend._client.__enter__.side_effect = lambda: sleep(0.3)
+        contents = [{"events": []}, {"events": [{"text": "Boilerplate"}]}]
+        backend._retrieve_client_screen_content = MagicMock(side_effect=contents)
+        with backend:
+            self.assertGreaterEqual(backend.boot_timings["api"], 0.3)
+        # The display never comes
+        backend._client.__enter__.side_effect = None
+        backend._retrieve_client_screen_content = MagicMock(return_value={"events": []})
+        with self.assertRaises(TimeoutError):
+            backend._start()
+
+    def test_wait_for_screen_change(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        first, second = make_png(), make_png(color=(255, 255, 255))
+        backend._last_screenshot_digest = image_digest(decode_image(first))
+        backend._client.get_screenshot.side_effect = [first, first, second]
+        backend.wait_for_screen_change(1)
+        self.assertEqual(backend._client.ticker_ctl.call_count, 2)
+        self.assertEqual(
+            backend._last_screenshot_digest, image_digest(decode_image(second))
+        )
+
+    def test_last_changed_region(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos)
+        image = Image.new("RGB", (8, 6))
+        image.putpixel((5, 4), (255, 255, 255))
+        iobytes = BytesIO()
+        image.save(iobytes, format="PNG")
+        backend._client.get_screenshot.side_effect = [make_png(), iobytes.getvalue()]
+        backend._take_reference_screenshot()
+        self.assertIsNone(backend.last_changed_region)
+        backend.wait_for_screen_change(1)
+        # only computed when asked for
+        self.assertIsNone(backend._last_changed_region)
+        self.assertEqual(backend.last_changed_region, (5, 4, 6, 5))
+        # the change is within the crop unless the crop leaves its pixels out
+        self.assertTrue(backend.last_change_within(None))
+        self.assertTrue(backend.last_change_within(Crop(lower=1)))
+        self.assertFalse(backend.last_change_within(Crop(lower=2)))
+        self.assertFalse(backend.last_change_within(Crop(right=3)))
+
+    def test_wait_for_screen_change_tick_batches(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, max_tick_batch=4)
+        first, second = make_png(), make_png(color=(255, 255, 255))
+        backend._last_screenshot_digest = image_digest(decode_image(first))
+        backend._client.get_screenshot.side_effect = [first] * 4 + [second]
+        with patch.object(backend, "send_ticks") as send_ticks:
+            backend.wait_for_screen_change(1)
+        self.assertEqual([c.args[0] for c in send_ticks.call_args_list], [1, 2, 4, 3])
+
+    def test_wait_for_screen_change_pipelined(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, screenshot_workers=2)
+        first, second, third = (
+            make_png(),
+            make_png(color=(255, 255, 255)),
+            make_png(color=(0, 0, 255)),
+        )
+        backend._last_screenshot_digest = image_digest(decode_image(first))
+        backend._client.get_screenshot.side_effect = [first, first, second, third]
+        with patch.object(backend, "send_ticks") as send_ticks:
+            backend.wait_for_screen_change(1)
+        # The first changed screen is kept, and at most 2 screenshots were pending
+        self.assertEqual(
+            backend._last_screenshot_digest, image_digest(decode_image(second))
+        )
+        self.assertLessEqual(send_ticks.call_count, 3)
+        backend._client.get_screenshot.side_effect = None
+        backend._client.get_screenshot.return_value = second
+        with patch.object(backend, "send_ticks") as send_ticks:
+            with self.assertRaises(TimeoutError):
+                backend.wait_for_screen_change(0.5)
+        self.assertEqual(sum(c.args[0] for c in send_ticks.call_args_list), 5)
+        backend.__exit__(None, None, None)
+        self.assertIsNone(backend._screenshot_pool)
+
+    def test_wait_for_screen_change_timeout(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, max_tick_batch=8)
+        backend._client.get_screenshot.return_value = make_png()
+        backend._last_screenshot_digest = image_digest(decode_image(make_png()))
+        with self.assertRaises(TimeoutError):
+            backend.wait_for_screen_change(1)
+        # 10 ticks in batches of 1, 2, 4 then 3
+        self.assertEqual(backend._client.ticker_ctl.call_count, 10)
+        self.assertEqual(backend._client.get_screenshot.call_count, 5)
+
+
+class FakeApduServer(Thread):
+    """
+    Answers APDUs on a raw socket as Speculos does: the response is the APDU
+    INS byte, with a 0x9000 status if the CLA is 0, else 0x6E00.
+    """
+
+    def __init__(self, stale: bytes = b"", delay: float = 0.0):
+        super().__init__(daemon=True)
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.stale = stale
+        self.delay = delay
+
+    def run(self):
+        connection, _ = self.server.accept()
+        with connection, self.server:
+            connection.sendall(self.stale)
+            while True:
+                try:
+                    header = connection.recv(4)
+                except ConnectionResetError:
+                    return
+                if not header:
+                    return
+                apdu = connection.recv(int.from_bytes(header, "big"))
+                status = b"\x90\x00" if apdu[0] == 0 else b"\x6e\x00"
+                sleep(self.delay)
+                connection.sendall((1).to_bytes(4, "big") + apdu[1:2] + status)
+
+
+class TestRawApduSocket(TestCase):
+    def setUp(self):
+        self.nanos = Devices.get_by_type(DeviceType.NANOS)
+
+    def test_exchange(self):
+        # response to an APDU sent through HTTP, pending on the raw socket
+        server = FakeApduServer(stale=(0).to_bytes(4, "big") + b"\x90\x00")
+        server.start()
+        raw = _RawApduSocket(server.port)
+        raw._connect()
+        sleep(0.05)
+        self.assertEqual(raw.exchange(bytes.fromhex("00020000")), RAPDU(0x9000, b"\x02"))
+        self.assertEqual(raw.exchange(bytes.fromhex("01030000")), RAPDU(0x6E00, b"\x03"))
+        raw.close()
+        server.join(1)
+
+    def test_backend_exchange_raw(self):
+        server = FakeApduServer()
+        server.start()
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(
+                APPNAME,
+                self.nanos,
+                use_raw_apdu=True,
+                args=["--apdu-port", str(server.port)],
+            )
+        rapdu = backend.exchange(0x00, 0x04)
+        self.assertEqual(rapdu, RAPDU(0x9000, b"\x04"))
+        self.assertFalse(backend._client._apdu_exchange.called)
+        with self.assertRaises(ExceptionRAPDU) as error:
+            backend.exchange(0x01, 0x05)
+        self.assertEqual(error.exception.status, 0x6E00)
+        backend.__exit__(None, None, None)
+        server.join(1)
+        self.assertFalse(server.is_alive())
+
+    def test_backend_exchange_raw_no_tick_timeout(self):
+        # A slow response must be waited for, not read from a non-blocking socket
+        server = FakeApduServer(delay=0.1)
+        server.start()
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(
+                APPNAME,
+                self.nanos,
+                use_raw_apdu=True,
+                args=["--apdu-port", str(server.port)],
+            )
+        self.assertEqual(backend.exchange(0x00, 0x04, tick_timeout=0), RAPDU(0x9000, b"\x04"))
+        self.assertEqual(backend._raw_apdu._socket.gettimeout(), None)
+        backend.__exit__(None, None, None)
+        server.join(1)
+
+    def test_exchange_timeout(self):
+        server = socket.create_server(("127.0.0.1", 0))
+        raw = _RawApduSocket(server.getsockname()[1])
+        with self.assertRaises(TimeoutError):
+            raw.exchange(bytes.fromhex("00020000"), timeout=0.1)
+        self.assertIsNone(raw._socket)
+        server.close()
+
+    def test_backend_exchange_many(self):
+        server = FakeApduServer()
+        server.start()
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(
+                APPNAME, self.nanos, args=["--apdu-port", str(server.port)]
+            )
+        rapdus = backend.exchange_many(
+            [bytes.fromhex("00010000"), bytes.fromhex("01020000")],
+            stop_on_error=False,
+        )
+        self.assertEqual(rapdus, [RAPDU(0x9000, b"\x01"), RAPDU(0x6E00, b"\x02")])
+        self.assertFalse(backend._client._apdu_exchange.called)
+        # the connection opened for the occasion is closed
+        self.assertIsNone(backend._raw_apdu)
+        server.join(1)
+        self.assertFalse(server.is_alive())
+
+    def test_backend_exchange_many_no_tick_timeout(self):
+        server = FakeApduServer(delay=0.1)
+        server.start()
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(
+                APPNAME, self.nanos, args=["--apdu-port", str(server.port)]
+            )
+        rapdus = backend.exchange_many(
+            [bytes.fromhex("00010000"), bytes.fromhex("00020000")], tick_timeout=0
+        )
+        self.assertEqual(rapdus, [RAPDU(0x9000, b"\x01"), RAPDU(0x9000, b"\x02")])
+        self.assertIsNone(backend._raw_apdu)
+        server.join(1)
+        self.assertFalse(server.is_alive())
+
+    def test_http_connection_pool(self):
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            backend = SpeculosBackend(APPNAME, self.nanos, http_pool_size=3)
+        backend._client.session.mount.assert_called_once()
+        prefix, adapter = backend._client.session.mount.call_args.args
+        self.assertEqual(prefix, "http://")
+        self.assertIsInstance(adapter, HTTPAdapter)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertFalse(adapter._pool_block)
+        with self.assertRaises(ValueError):
+            SpeculosBackend(APPNAME, self.nanos, http_pool_size=1)
+
+
+class TestOptionalSpeculos(TestCase):
+    def test_backend_imports_without_speculos_extra(self):
+        missing = dict.fromkeys(["speculos", "speculos.client", "speculos.mcu.seproxyhal", "numpy"])
+        # the package attribute is rebound by the import below
+        self.addCleanup(setattr, ragger, "backend", ragger.backend)
+        with patch.dict(sys.modules, missing):
+            for name in ["ragger.backend", "ragger.backend.speculos", "ragger.backend.speculos_async"]:
+                sys.modules.pop(name, None)
+            backend = importlib.import_module("ragger.backend")
+            with self.assertRaises(ImportError):
+                backend.SpeculosBackend(APPNAME, None)
@@ -0,0 +1,211 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from io import BytesIO
+from ledgered.devices import DeviceType, Devices
+from threading import get_ident
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from ragger.backend import AsyncSpeculosBackend, RaisePolicy
+from ragger.backend.speculos_async import _AsyncHttpClient
+from ragger.utils import RAPDU
+
+from ..helpers import make_png
+
+APPNAME = "some app"
+
+
+async def read_request(reader):
+    """
+    :return: The next request (head and body) sent on the connection, or None
+             if the connection was closed
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    length = [
+        int(line.split(b":")[1])
+        for line in head.split(b"\r\n")
+        if line.lower().startswith(b"content-length")
+    ][0]
+    return head + await reader.readexactly(length)
+
+
+class TestAsyncHttpClient(IsolatedAsyncioTestCase):
+    async def serve(self, *responses: bytes):
+        """
+        Starts a server answering each request with the next response, then
+        closing the connection if the response is followed by `None`.
+        """
+        self.requests = list()
+        self.connections = 0
+        pending = list(responses)
+
+        async def handle(reader, writer):
+            self.connections += 1
+            while pending:
+                self.requests.append(await read_request(reader))
+                writer.write(pending.pop(0))
+                await writer.drain()
+                if pending and pending[0] is None:
+                    pending.pop(0)
+                    break
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.addAsyncCleanup(self.stop, server)
+        return _AsyncHttpClient("127.0.0.1", server.sockets[0].getsockname()[1])
+
+    async def stop(self, server):
+        server.close()
+        await server.wait_closed()
+
+    async def test_content_length_keep_alive(self):
+        client = await self.serve(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+            b"HTTP/1.1 404 NOT FOUND\r\nContent-Length: 0\r\n\r\n",
+        )
+        self.assertEqual(await client.request("POST", "/apdu", {"data": "00"}), (200, b"ok"))
+        self.assertEqual(await client.request("GET", "/screenshot"), (404, b""))
+        self.assertEqual(self.connections, 1)
+        self.assertTrue(self.requests[0].startswith(b"POST /apdu HTTP/1.1\r\n"))
+        self.assertTrue(self.requests[0].endswith(b'\r\n\r\n{"data": "00"}'))
+        await client.close()
+
+    async def test_chunked(self):
+        client = await self.serve(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"3\r\n{\"d\r\n5;ext=1\r\n\": 1}\r\n0\r\n\r\n"
+        )
+        self.assertEqual(await client.request("GET", "/"), (200, b'{"d": 1}'))
+        await client.close()
+
+    async def test_close_delimited(self):
+        client = await self.serve(
+            b"HTTP/1.0 200 OK\r\n\r\nfirst",
+            None,
+            b"HTTP/1.0 200 OK\r\n\r\nsecond",
+        )
+        self.assertEqual(await client.request("GET", "/"), (200, b"first"))
+        self.assertEqual(await client.request("GET", "/"), (200, b"second"))
+        self.assertEqual(self.connections, 2)
+
+    async def test_stale_kept_alive_connection(self):
+        client = await self.serve(
+            b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nfirst",
+            None,
+            b"HTTP/1.1 200 OK\r\nContent-Length: 6\r\n\r\nsecond",
+        )
+        self.assertEqual(await client.request("GET", "/"), (200, b"first"))
+        # the server closed the kept-alive connection: the request is sent again
+        await asyncio.sleep(0.05)
+        self.assertEqual(await client.request("GET", "/"), (200, b"second"))
+        self.assertEqual(self.connections, 2)
+        await client.close()
+
+    async def test_interrupted_chunked_response(self):
+        client = await self.serve(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n", None
+        )
+        with self.assertRaises(asyncio.IncompleteReadError):
+            await client.request("POST", "/apdu", {})
+
+
+class TestAsyncSpeculosBackend(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.backend = self.make_backend()
+
+    def make_backend(self) -> AsyncSpeculosBackend:
+        with patch("ragger.backend.speculos.SpeculosClient"):
+            return AsyncSpeculosBackend(APPNAME, Devices.get_by_type(DeviceType.NANOS))
+
+    async def test_aexchange_raw(self):
+        with patch.object(self.backend, "_post", AsyncMock(return_value=b'{"data": "01029000"}')):
+            self.assertEqual(
+                await self.backend.aexchange_raw(b"\xe0\x01"), RAPDU(0x9000, b"\x01\x02")
+            )
+            self.backend._post.assert_awaited_once_with(
+                "/apdu", {"data": "e001", "tick_timeout": 5 * 60 * 10}
+            )
+
+            self.backend.raise_policy = RaisePolicy.RAISE_NOTHING
+            self.backend._post.return_value = b'{"data": "036a80"}'
+            self.assertEqual(
+                await self.backend.aexchange_raw(b"\xe0\x01"), RAPDU(0x6A80, b"\x03")
+            )
+
+    async def test_aexchange_raw_tick_timeout(self):
+        with patch.object(
+            self.backend, "_post", AsyncMock(side_effect=asyncio.IncompleteReadError(b"", None))
+        ):
+            with self.assertRaises(TimeoutError):
+                await self.backend.aexchange_raw(b"\xe0\x01")
+
+    async def test_more_pending_apdus_than_executor_workers(self):
+        # No APDU is answered before all of them are pending, while the default
+        # executor of the loop only has a single worker
+        count = 8
+        pending = list()
+        all_pending = asyncio.Event()
+
+        async def handle(reader, writer):
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                if request.startswith(b"POST /apdu "):
+                    pending.append(request)
+                    if len(pending) == count:
+                        all_pending.set()
+                    await all_pending.wait()
+                    body = b'{"data": "9000"}'
+                else:
+                    body = b"{}"
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+                await writer.drain()
+            writer.close()
+
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        backends = [self.make_backend() for _ in range(count)]
+        for backend in backends:
+            backend._http = _AsyncHttpClient("127.0.0.1", server.sockets[0].getsockname()[1])
+            self.addAsyncCleanup(backend._http.close)
+
+        async def exchange_all():
+            async with AsyncExitStack() as stack:
+                for backend in backends:
+                    await stack.enter_async_context(backend.aexchange_async_raw(b"\xe0\x01"))
+                # Other requests still go through while the APDUs are pending
+                await backends[0].asend_tick()
+
+        await asyncio.wait_for(exchange_all(), timeout=5)
+        self.assertEqual(len(pending), count)
+        for backend in backends:
+            self.assertEqual(backend.last_async_response, RAPDU(0x9000, b""))
+
+    async def test_await_screen_change_decodes_off_the_loop(self):
+        self.backend._set_last_screenshot(
+            BytesIO(make_png()), *self.backend._decode_screenshot(BytesIO(make_png()))
+        )
+        threads = list()
+        decode = self.backend._decode_screenshot
+
+        def tracked_decode(screenshot):
+            threads.append(get_ident())
+            return decode(screenshot)
+
+        with patch.object(self.backend, "_decode_screenshot", tracked_decode), patch.object(
+            self.backend, "aget_screenshot", AsyncMock(side_effect=[make_png(), make_png((255, 0, 0))])
+        ), patch.object(self.backend, "asend_tick", AsyncMock()) as asend_tick:
+            await self.backend.await_screen_change(timeout=1.0)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(get_ident(), threads)
+        asend_tick.assert_awaited_once_with()
+        self.assertEqual(
+            self.backend._last_screenshot.getvalue(), make_png((255, 0, 0))
+        )
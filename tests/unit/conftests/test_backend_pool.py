@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ledgered.devices import DeviceType, Devices
+
+from ragger.conftest.backend_pool import BackendPool
+
+
+class TestBackendPool(TestCase):
+    def setUp(self):
+        self.pool = BackendPool()
+        self.key = BackendPool.key(
+            Path("app.elf"), Devices.get_by_type(DeviceType.STAX), ["--seed", "a"]
+        )
+        self.factory = MagicMock(side_effect=lambda: MagicMock())
+
+    def test_key(self):
+        stax = Devices.get_by_type(DeviceType.STAX)
+        flex = Devices.get_by_type(DeviceType.FLEX)
+        self.assertEqual(
+            self.key, BackendPool.key(Path("app.elf"), stax, ["--seed", "a"])
+        )
+        self.assertNotEqual(
+            self.key, BackendPool.key(Path("app.elf"), stax, ["--seed", "b"])
+        )
+        self.assertNotEqual(
+            self.key, BackendPool.key(Path("app.elf"), flex, ["--seed", "a"])
+        )
+        self.assertNotEqual(
+            self.key, BackendPool.key(Path("other.elf"), stax, ["--seed", "a"])
+        )
+
+    def test_acquire_starts_instance(self):
+        backend = self.pool.acquire(self.key, self.factory)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(backend.__enter__.call_count, 1)
+        self.assertEqual(self.pool.started, 1)
+        self.assertEqual(self.pool.idle(self.key), 0)
+
+    def test_release_then_acquire_reuses_instance(self):
+        backend = self.pool.acquire(self.key, self.factory)
+        self.pool.release(self.key, backend)
+        self.assertEqual(backend.reset.call_count, 1)
+        self.assertEqual(self.pool.idle(self.key), 1)
+
+        self.assertIs(self.pool.acquire(self.key, self.factory), backend)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(backend.__enter__.call_count, 1)
+        self.assertEqual(self.pool.idle(self.key), 0)
+
+    def test_acquire_other_key_starts_new_instance(self):
+        backend = self.pool.acquire(self.key, self.factory)
+        self.pool.release(self.key, backend)
+        other_key = BackendPool.key(
+            Path("app.elf"), Devices.get_by_type(DeviceType.FLEX), []
+        )
+        self.assertIsNot(self.pool.acquire(other_key, self.factory), backend)
+        self.assertEqual(self.pool.started, 2)
+
+    def test_release_stops_instance_that_cannot_be_reset(self):
+        backend = self.pool.acquire(self.key, self.factory)
+        backend.reset.side_effect = TimeoutError()
+        self.pool.release(self.key, backend)
+        self.assertEqual(backend.__exit__.call_count, 1)
+        self.assertEqual(self.pool.started, 0)
+        self.assertEqual(self.pool.idle(self.key), 0)
+        self.assertIsNot(self.pool.acquire(self.key, self.factory), backend)
+
+    def test_close_stops_every_instance(self):
+        first = self.pool.acquire(self.key, self.factory)
+        second = self.pool.acquire(self.key, self.factory)
+        self.pool.release(self.key, first)
+        second.__exit__.side_effect = RuntimeError()
+        self.pool.close()
+        self.assertEqual(first.__exit__.call_count, 1)
+        self.assertEqual(second.__exit__.call_count, 1)
+        self.assertEqual(self.pool.started, 0)
+        self.assertEqual(self.pool.idle(self.key), 0)
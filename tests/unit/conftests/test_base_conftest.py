@@ -4,7 +4,7 @@ from ledgered.devices import DeviceType, Devices
 from pathlib import Path
 from typing import Tuple
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from ragger.conftest import base_conftest as bc
 
@@ -154,6 +154,24 @@ class TestBaseConftest(TestCase):
                     )
                 self.assertEqual(result, backend())
 
+    def test_pooled_speculos_backend(self):
+        pool = MagicMock()
+        pool.acquire.side_effect = lambda key, factory: factory()
+        with patch("ragger.conftest.base_conftest.create_speculos_backend") as factory:
+            with temporary_directory() as temp_dir:
+                prepare_base_dir(temp_dir)
+                with patch("ragger.conftest.base_conftest.Manifest", ManifestMock):
+                    backends = bc.pooled_speculos_backend(
+                        pool, temp_dir, self.stax, False, False, None, self.seed, []
+                    )
+                    self.assertEqual(next(backends), factory.return_value)
+                    backends.close()
+        # Same factory as for a backend out of the pool
+        factory.assert_called_once()
+        pool.release.assert_called_once_with(
+            pool.acquire.call_args.args[0], factory.return_value
+        )
+
     def test_create_backend_ledgercomm(self):
         with patch("ragger.conftest.base_conftest.LedgerWalletBackend") as backend:
             result = bc.create_backend(
@@ -1,9 +1,18 @@
 from contextlib import contextmanager
+from io import BytesIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+from PIL import Image
+
 
 @contextmanager
 def temporary_directory():
     with TemporaryDirectory() as dir_path:
         yield Path(dir_path).resolve()
+
+
+def make_png(color=(0, 0, 0), width: int = 8, height: int = 6) -> bytes:
+    iobytes = BytesIO()
+    Image.new("RGB", (width, height), color).save(iobytes, format="PNG")
+    return iobytes.getvalue()
@@ -1,11 +1,20 @@
 from ledgered.devices import DeviceType, Devices
 from pathlib import Path
+from shutil import rmtree
 from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 from ragger.backend import SpeculosBackend, LedgerCommBackend
 from ragger.navigator import BaseNavInsID, Navigator, NavIns, NavInsID
+from ragger.navigator.plan_cache import NavigationPlanCache
+from ragger.utils import Crop
+from ragger.utils.packed_snapshots import pack_snapshots
+
+
+class DictStore(dict):
+    def set(self, key, value):
+        self[key] = value
 
 
 class TestNavigator(TestCase):
@@ -64,6 +73,17 @@ class TestNavigator(TestCase):
             self.navigator._check_snaps_dir_path(self.pathdir, name, True)
         self.assertFalse(expected.exists())
 
+    def test__checks_snaps_dir_path_ok_packed(self):
+        name = "some_name"
+        device_dir = self.pathdir / "snapshots" / self.device.name
+        (device_dir / name).mkdir(parents=True)
+        (device_dir / name / "00000.png").write_bytes(b"png")
+        pack_snapshots(device_dir)
+        rmtree(device_dir)
+        result = self.navigator._check_snaps_dir_path(self.pathdir, name, True)
+        self.assertEqual(result, device_dir / name)
+        self.assertFalse(result.exists())
+
     def test___init_snaps_temp_dir_ok_creates_dir(self):
         name = "some_name"
         expected = self.pathdir / "snapshots-tmp" / self.device.name / name
@@ -120,6 +140,19 @@ class TestNavigator(TestCase):
             self.navigator._backend.compare_screen_with_snapshot.call_count, 1
         )
 
+    def test__compare_snap_with_timeout_backoff(self):
+        self.navigator._backend.compare_screen_with_snapshot.side_effect = [False] * 6 + [
+            True
+        ]
+        with patch("ragger.navigator.navigator.sleep") as patched_sleep:
+            with patch("ragger.navigator.navigator.uniform", side_effect=lambda a, b: b):
+                self.assertTrue(
+                    self.navigator._compare_snap_with_timeout("not important", 10)
+                )
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.005, 0.01, 0.02, 0.04, 0.08, 0.1])
+        self.assertEqual(self.navigator.snap_match_polls, [7])
+
     def test_compare_snap_ok(self):
         self.navigator._backend.compare_screen_with_snapshot.return_value = True
         self.assertIsNone(self.navigator._compare_snap(self.pathdir, self.pathdir, 1))
@@ -150,6 +183,30 @@ class TestNavigator(TestCase):
         self.assertEqual(cb_wait.call_count, 1)
         self.assertEqual(cb_wait.call_args, ((),))
 
+    def test__run_instructions_review_confirm(self):
+        cb_confirm = MagicMock()
+        self.navigator._callbacks = {NavInsID.USE_CASE_REVIEW_CONFIRM: cb_confirm}
+        self.backend.last_screen_differs_from.side_effect = [False, False, True]
+        self.navigator._run_instruction(NavInsID.USE_CASE_REVIEW_CONFIRM)
+        self.assertEqual(cb_confirm.call_count, 1)
+        self.assertEqual(self.backend.wait_for_screen_change.call_count, 3)
+        reference = self.backend.capture_reference.return_value
+        for call in self.backend.last_screen_differs_from.call_args_list:
+            self.assertIs(call.args[0], reference)
+            self.assertEqual(call.args[1], Crop(lower=220))
+
+    def test__run_instructions_review_confirm_progress_bar_only(self):
+        cb_confirm = MagicMock()
+        self.navigator._callbacks = {NavInsID.USE_CASE_REVIEW_CONFIRM: cb_confirm}
+        # second change only within the progress bar, third one above it
+        self.backend.last_change_within.side_effect = [False, True]
+        self.backend.last_screen_differs_from.side_effect = [False, True]
+        self.navigator._run_instruction(NavInsID.USE_CASE_REVIEW_CONFIRM)
+        self.assertEqual(self.backend.wait_for_screen_change.call_count, 3)
+        self.assertEqual(self.backend.last_screen_differs_from.call_count, 2)
+        for call in self.backend.last_change_within.call_args_list:
+            self.assertEqual(call.args[0], Crop(lower=220))
+
     def test__run_instructions_custom_instruction(self):
 
         class TestInsID(BaseNavInsID):
@@ -180,6 +237,64 @@ class TestNavigator(TestCase):
             self.assertEqual(cb.call_count, 1)
             self.assertEqual(cb.call_args, (ni.args, ni.kwargs))
 
+    def test_navigate_and_compare_deferred_golden_run(self):
+        cb_wait, cb1 = MagicMock(), MagicMock()
+        ni1 = NavIns(1)
+        self.navigator._callbacks = {NavInsID.WAIT: cb_wait, ni1.id: cb1}
+        self.navigator._golden_run = True
+        self.navigator._backend.get_screenshot.side_effect = [b"first", b"second"]
+        self.navigator.navigate_and_compare(
+            self.pathdir, "test", [ni1], deferred_compare=True
+        )
+        self.navigator._backend.compare_screen_with_snapshot.assert_not_called()
+        compare = self.navigator._backend.compare_screenshot_with_snapshot
+        self.assertEqual(compare.call_count, 2)
+        for index, content in enumerate([b"first", b"second"]):
+            golden, tmp = (
+                self.navigator._get_snap_path(
+                    self.navigator._get_snaps_dir_path(self.pathdir, "test", is_golden),
+                    index,
+                )
+                for is_golden in (True, False)
+            )
+            self.assertEqual(tmp.read_bytes(), content)
+            self.assertEqual(
+                compare.call_args_list[index], ((content, golden), {"golden_run": True})
+            )
+        self.assertIsNone(self.navigator._deferred_snaps)
+
+    def test_navigate_and_compare_deferred_navigation_failure(self):
+        cb_wait, cb1 = MagicMock(), MagicMock()
+        ni1 = NavIns(1)
+        cb1.side_effect = RuntimeError("navigation failed")
+        self.navigator._callbacks = {NavInsID.WAIT: cb_wait, ni1.id: cb1}
+        self.navigator._backend.get_screenshot.return_value = b"first"
+        self.navigator._get_snaps_dir_path(self.pathdir, "test", True).mkdir(parents=True)
+        with self.assertRaises(RuntimeError):
+            self.navigator.navigate_and_compare(
+                self.pathdir, "test", [ni1], deferred_compare=True
+            )
+        # The screens captured before the failure are kept, but not compared
+        tmp = self.navigator._get_snap_path(
+            self.navigator._get_snaps_dir_path(self.pathdir, "test", False), 0
+        )
+        self.assertEqual(tmp.read_bytes(), b"first")
+        self.navigator._backend.compare_screenshot_with_snapshot.assert_not_called()
+        self.assertIsNone(self.navigator._deferred_snaps)
+
+    def test_navigate_and_compare_deferred_without_screenshots(self):
+        cb_wait, cb1 = MagicMock(), MagicMock()
+        ni1 = NavIns(1)
+        self.navigator._callbacks = {NavInsID.WAIT: cb_wait, ni1.id: cb1}
+        self.navigator._golden_run = True
+        self.navigator._backend.get_screenshot.return_value = None
+        self.navigator.navigate_and_compare(
+            self.pathdir, "test", [ni1], deferred_compare=True
+        )
+        self.assertEqual(
+            self.navigator._backend.compare_screen_with_snapshot.call_count, 2
+        )
+
     def test_navigate_and_compare_ok(self):
         cb_wait, cb1, cb2 = MagicMock(), MagicMock(), MagicMock()
         ni1, ni2 = NavIns(1, (1,), {"1": 1}), NavIns(2, (2,), {"2": 2})
@@ -206,6 +321,50 @@ class TestNavigator(TestCase):
             self.assertEqual(cb.call_count, 1)
             self.assertEqual(cb.call_args, (ni.args, ni.kwargs))
 
+    def test_navigate_until_text_and_compare_plan_cache(self):
+        self.navigator._backend = MagicMock(spec=SpeculosBackend)
+        self.navigator._run_instruction = MagicMock()
+        store = DictStore()
+        self.navigator.plan_cache = NavigationPlanCache(store)
+        ni1 = NavIns(1)
+        compare_text = self.navigator._backend.compare_screen_with_text
+        fingerprints = self.navigator._backend.last_screen_fingerprint
+
+        def navigate(texts, screens):
+            self.navigator.plan_cache.start("test")
+            self.navigator._run_instruction.reset_mock()
+            compare_text.reset_mock()
+            compare_text.side_effect = texts
+            fingerprints.side_effect = screens
+            self.navigator.navigate_until_text_and_compare(ni1, [], "text")
+
+        # Discovery: the text is looked for before each step, and the plan stored
+        navigate([False, False, True], [b"\x01", b"\x02"])
+        self.assertEqual(list(store.values()), [["01", "02"]])
+
+        # Replay: the steps reach the planned screens, the text is only checked
+        # before and after them
+        navigate([False, True], [b"\x01", b"\x02"])
+        self.assertEqual(self.navigator._run_instruction.call_count, 3)
+        self.assertEqual(compare_text.call_count, 2)
+        self.assertEqual(list(store.values()), [["01", "02"]])
+
+        # Shorter flow: the first step reaches another screen, holding the text.
+        # No step is taken past it.
+        navigate([False, True], [b"\x03"])
+        self.assertEqual(self.navigator._run_instruction.call_count, 2)
+        self.assertEqual(list(store.values()), [["03"]])
+
+        # Longer flow: the text is not there after the planned steps
+        navigate([False, False, False, True], [b"\x03", b"\x04"])
+        self.assertEqual(self.navigator._run_instruction.call_count, 3)
+        self.assertEqual(list(store.values()), [["03", "04"]])
+
+        # The text is already displayed: no step is replayed
+        navigate([True], [])
+        self.assertEqual(self.navigator._run_instruction.call_count, 1)
+        self.assertEqual(list(store.values()), [[]])
+
     def test_navigate_until_text_and_compare_ok_no_snapshots(self):
         self.navigator._backend = MagicMock(spec=SpeculosBackend)
         self.navigator._backend.compare_screen_with_text.side_effect = [
@@ -0,0 +1,76 @@
+from pathlib import Path
+from unittest import TestCase
+
+from ragger.navigator import NavIns, NavInsID
+from ragger.navigator.plan_cache import NavigationPlanCache
+
+
+class DictStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+class TestNavigationPlanCache(TestCase):
+    def setUp(self):
+        self.store = DictStore()
+        self.plans = NavigationPlanCache(self.store)
+
+    def test_no_key_outside_of_a_scope(self):
+        self.assertIsNone(self.plans.key("call"))
+        self.plans.start("test", "nanos", "elf")
+        self.plans.stop()
+        self.assertIsNone(self.plans.key("call"))
+
+    def test_keys(self):
+        self.plans.start("test", "nanos", "elf")
+        first, second, other = (
+            self.plans.key("call"),
+            self.plans.key("call"),
+            self.plans.key("other"),
+        )
+        self.assertEqual(len({first, second, other}), 3)
+        self.assertTrue(first.startswith(NavigationPlanCache.KEY_PREFIX + "/"))
+        # Calls are numbered again in a new scope
+        self.plans.start("test", "nanos", "elf")
+        self.assertEqual(self.plans.key("call"), first)
+        self.plans.start("test", "nanos", "other elf")
+        self.assertNotEqual(self.plans.key("call"), first)
+
+    def test_get_set_drop(self):
+        self.plans.start("test")
+        key = self.plans.key("call")
+        self.assertIsNone(self.plans.get(key))
+        self.plans.set(key, ["01", "02"])
+        self.assertEqual(self.plans.get(key), ["01", "02"])
+        self.assertEqual(NavigationPlanCache(self.store).get(key), ["01", "02"])
+        self.plans.drop(key)
+        self.assertIsNone(self.plans.get(key))
+        # Plans stored by previous versions (step counts) are ignored
+        self.store.set(key, 4)
+        self.assertIsNone(self.plans.get(key))
+
+    def test_path(self):
+        plans = NavigationPlanCache(self.store, Path("/checkout/app"))
+        self.assertEqual(plans.path(Path("/checkout/app/tests")), "tests")
+        self.assertEqual(plans.path("/elsewhere/tests"), "/elsewhere/tests")
+        self.assertEqual(plans.path(None), "None")
+        self.assertEqual(self.plans.path(Path("/checkout/app/tests")), "/checkout/app/tests")
+
+    def test_instruction(self):
+        first = NavIns(NavInsID.TOUCH, (10, 20), {"b": 1, "a": 2})
+        second = NavIns(NavInsID.TOUCH, (10, 20), {"a": 2, "b": 1})
+        self.assertEqual(self.plans.instruction(first), self.plans.instruction(second))
+        # Equal instructions give the same key, from one run to another
+        self.plans.start("test")
+        key = self.plans.key(self.plans.instruction(first))
+        self.plans.start("test")
+        self.assertEqual(self.plans.key(self.plans.instruction(second)), key)
+        self.assertNotEqual(
+            self.plans.instruction(first),
+            self.plans.instruction(NavIns(NavInsID.TOUCH, (10, 21), {"a": 2, "b": 1})),
+        )
+        # An instruction ID stands for the instruction without arguments
+        self.assertEqual(
+            self.plans.instruction(NavInsID.RIGHT_CLICK),
+            self.plans.instruction(NavIns(NavInsID.RIGHT_CLICK)),
+        )
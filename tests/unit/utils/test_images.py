@@ -0,0 +1,136 @@
+import os
+from io import BytesIO
+from unittest import TestCase
+
+import numpy as np
+from PIL import Image
+
+from ragger.utils import Crop
+from ragger.utils.images import (
+    SnapshotCache,
+    changed_region,
+    crop_image,
+    decode_image,
+    image_digest,
+    images_equal,
+)
+
+from ..helpers import make_png, temporary_directory
+
+
+class TestImages(TestCase):
+    def test_decode_image_sources(self):
+        png = make_png(color=(1, 2, 3))
+        with temporary_directory() as dir_path:
+            path = dir_path / "img.png"
+            path.write_bytes(png)
+            for source in (png, BytesIO(png), path, str(path)):
+                pixels = decode_image(source)
+                self.assertEqual(pixels.shape, (6, 8, 3))
+                self.assertEqual(pixels.dtype, np.uint8)
+                self.assertEqual(tuple(pixels[0, 0]), (1, 2, 3))
+
+    def test_decode_image_converts_to_rgb(self):
+        iobytes = BytesIO()
+        Image.new("RGBA", (4, 2), (1, 2, 3, 4)).save(iobytes, format="PNG")
+        pixels = decode_image(iobytes.getvalue())
+        self.assertEqual(pixels.shape, (2, 4, 3))
+        self.assertEqual(tuple(pixels[0, 0]), (1, 2, 3))
+
+    def test_crop_image(self):
+        pixels = np.arange(6 * 8 * 3, dtype=np.uint8).reshape((6, 8, 3))
+        self.assertIs(crop_image(pixels), pixels)
+        cropped = crop_image(pixels, Crop(left=1, upper=2, right=3, lower=1))
+        self.assertEqual(cropped.shape, (3, 4, 3))
+        self.assertTrue(np.array_equal(cropped, pixels[2:5, 1:5]))
+
+    def test_changed_region(self):
+        first = decode_image(make_png())
+        self.assertIsNone(changed_region(first, first.copy()))
+        second = first.copy()
+        second[2, 3] = (0, 0, 1)
+        second[4, 1] = (1, 0, 0)
+        self.assertEqual(changed_region(first, second), (1, 2, 4, 5))
+        self.assertEqual(
+            changed_region(first, decode_image(make_png(width=5, height=4))), (0, 0, 5, 4)
+        )
+
+    def test_images_equal(self):
+        first = decode_image(make_png())
+        self.assertTrue(images_equal(first, decode_image(make_png())))
+        self.assertFalse(images_equal(first, decode_image(make_png(color=(0, 0, 1)))))
+        self.assertFalse(images_equal(first, decode_image(make_png(width=9))))
+
+    def test_image_digest(self):
+        first = decode_image(make_png())
+        self.assertEqual(image_digest(first), image_digest(decode_image(make_png())))
+        self.assertNotEqual(
+            image_digest(first), image_digest(decode_image(make_png(color=(0, 0, 1))))
+        )
+        # Same pixel bytes, different shape
+        self.assertNotEqual(
+            image_digest(decode_image(make_png(width=6, height=8))), image_digest(first)
+        )
+        # Digest of a view, without copying it beforehand
+        cropped = crop_image(first, Crop(left=1))
+        self.assertEqual(image_digest(cropped), image_digest(cropped.copy()))
+
+
+class TestSnapshotCache(TestCase):
+    def test_get_decodes_once(self):
+        cache = SnapshotCache()
+        with temporary_directory() as dir_path:
+            path = dir_path / "img.png"
+            path.write_bytes(make_png())
+            first = cache.get(path)
+            self.assertIs(cache.get(path), first)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.size, first.nbytes)
+            self.assertFalse(first.flags.writeable)
+            self.assertEqual(cache.get_digest(path), image_digest(first))
+            self.assertEqual(len(cache), 1)
+
+    def test_get_crop_is_part_of_the_key(self):
+        cache = SnapshotCache()
+        with temporary_directory() as dir_path:
+            path = dir_path / "img.png"
+            path.write_bytes(make_png())
+            full = cache.get(path)
+            cropped = cache.get(path, Crop(lower=2))
+            self.assertEqual(full.shape, (6, 8, 3))
+            self.assertEqual(cropped.shape, (4, 8, 3))
+            self.assertEqual(len(cache), 2)
+
+    def test_get_reloads_modified_file(self):
+        cache = SnapshotCache()
+        with temporary_directory() as dir_path:
+            path = dir_path / "img.png"
+            path.write_bytes(make_png())
+            first = cache.get(path)
+            path.write_bytes(make_png(color=(255, 255, 255)))
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            second = cache.get(path)
+            self.assertFalse(images_equal(first, second))
+
+    def test_get_evicts_least_recently_used(self):
+        entry_size = 6 * 8 * 3
+        cache = SnapshotCache(budget=2 * entry_size)
+        with temporary_directory() as dir_path:
+            paths = [dir_path / f"{index}.png" for index in range(3)]
+            for path in paths:
+                path.write_bytes(make_png())
+            cache.get(paths[0])
+            cache.get(paths[1])
+            # refresh the first one, so that the second one is the oldest
+            cache.get(paths[0])
+            cache.get(paths[2])
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.size, 2 * entry_size)
+            keys = [key[0] for key in cache._entries]
+            self.assertEqual(keys, [str(paths[0]), str(paths[2])])
+
+    def test_get_missing_file_raises(self):
+        with temporary_directory() as dir_path:
+            with self.assertRaises(FileNotFoundError):
+                SnapshotCache().get(dir_path / "missing.png")
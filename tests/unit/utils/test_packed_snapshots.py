@@ -0,0 +1,121 @@
+import os
+from unittest import TestCase
+
+from ragger.utils import Crop
+from ragger.utils.images import SnapshotCache, decode_image
+from ragger.utils.packed_snapshots import (
+    _PACKS,
+    SnapshotPack,
+    is_packed_directory,
+    main,
+    pack_snapshots,
+    read_packed,
+    unpack_snapshots,
+)
+
+from ..helpers import make_png, temporary_directory
+
+
+class TestPackedSnapshots(TestCase):
+    def setUp(self):
+        self._directory = temporary_directory()
+        self.dir_path = self._directory.__enter__()
+        self.device_dir = self.dir_path / "snapshots" / "nanos"
+        self.images = {
+            "test_one/00000.png": make_png((255, 0, 0)),
+            "test_one/00001.png": make_png((0, 255, 0)),
+            "test/nested/00000.png": make_png((0, 0, 255)),
+        }
+        for name, content in self.images.items():
+            path = self.device_dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        (self.device_dir / "test_one" / "digests.json").write_text("{}")
+
+    def tearDown(self):
+        self._directory.__exit__(None, None, None)
+
+    def test_pack_and_unpack(self):
+        pack_path = pack_snapshots(self.device_dir)
+        self.assertEqual(pack_path, self.dir_path / "snapshots" / "nanos.rgpk")
+        pack = SnapshotPack(pack_path)
+        self.assertEqual(pack.names(), sorted(self.images))
+        for name, content in self.images.items():
+            self.assertEqual(pack.read(name), content)
+        with self.assertRaises(KeyError):
+            pack.read("test_one/digests.json")
+        pack.close()
+
+        directory = unpack_snapshots(pack_path, self.dir_path / "unpacked")
+        for name, content in self.images.items():
+            self.assertEqual((directory / name).read_bytes(), content)
+
+    def test_not_a_pack(self):
+        path = self.dir_path / "some.rgpk"
+        path.write_bytes(make_png())
+        with self.assertRaises(ValueError):
+            SnapshotPack(path)
+
+    def test_read_packed(self):
+        pack_snapshots(self.device_dir)
+        packed_dir = self.dir_path / "packed" / "snapshots" / "nanos"
+        pack_snapshots(self.device_dir, packed_dir.with_suffix(".rgpk"))
+        content, stamp = read_packed(packed_dir / "test" / "nested" / "00000.png")
+        self.assertEqual(content, self.images["test/nested/00000.png"])
+        self.assertIsNone(read_packed(packed_dir / "test_one" / "00002.png"))
+        self.assertIsNone(read_packed(self.dir_path / "elsewhere" / "00000.png"))
+
+        self.assertTrue(is_packed_directory(packed_dir / "test_one"))
+        self.assertTrue(is_packed_directory(packed_dir / "test"))
+        self.assertFalse(is_packed_directory(packed_dir / "test_two"))
+
+        # A rebuilt pack is reopened
+        (self.device_dir / "test_one" / "00000.png").write_bytes(make_png())
+        pack_path = pack_snapshots(self.device_dir, packed_dir.with_suffix(".rgpk"))
+        os.utime(pack_path, ns=(1, 1))
+        content, new_stamp = read_packed(packed_dir / "test_one" / "00000.png")
+        self.assertEqual(content, make_png())
+        self.assertNotEqual(new_stamp, stamp)
+
+    def test_packs_registry(self):
+        packed_dir = self.dir_path / "packed" / "nanos"
+        golden = packed_dir / "test_one" / "00000.png"
+        # No pack yet: the miss is not remembered
+        self.assertIsNone(read_packed(golden))
+        pack_path = pack_snapshots(self.device_dir, packed_dir.with_suffix(".rgpk"))
+        self.assertEqual(read_packed(golden)[0], self.images["test_one/00000.png"])
+        pack = _PACKS._packs[pack_path]
+
+        # The pack replaced by a rebuilt one is closed
+        pack_snapshots(self.device_dir, pack_path)
+        os.utime(pack_path, ns=(1, 1))
+        self.assertIsNotNone(read_packed(golden))
+        self.assertTrue(pack._map.closed)
+        self.assertIsNot(_PACKS._packs[pack_path], pack)
+
+        # So is a removed one
+        pack = _PACKS._packs[pack_path]
+        pack_path.unlink()
+        self.assertIsNone(read_packed(golden))
+        self.assertTrue(pack._map.closed)
+        self.assertNotIn(pack_path, _PACKS._packs)
+
+    def test_decode_packed_goldens(self):
+        packed_dir = self.dir_path / "packed" / "nanos"
+        pack_snapshots(self.device_dir, packed_dir.with_suffix(".rgpk"))
+        golden = packed_dir / "test_one" / "00001.png"
+        self.assertEqual(decode_image(golden)[0, 0].tolist(), [0, 255, 0])
+        cache = SnapshotCache()
+        self.assertEqual(cache.get(golden, Crop(lower=2)).shape, (4, 8, 3))
+        with self.assertRaises(FileNotFoundError):
+            cache.get(packed_dir / "test_one" / "00002.png")
+        # Files take precedence over the pack
+        golden.parent.mkdir(parents=True)
+        golden.write_bytes(make_png())
+        self.assertEqual(cache.get(golden)[0, 0].tolist(), [0, 0, 0])
+
+    def test_main(self):
+        main(["pack", str(self.device_dir), "--output", str(self.dir_path / "out.rgpk")])
+        main(["unpack", str(self.dir_path / "out.rgpk")])
+        for name, content in self.images.items():
+            self.assertEqual((self.dir_path / "out" / name).read_bytes(), content)
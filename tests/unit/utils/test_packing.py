@@ -16,3 +16,62 @@ class TestPacking(TestCase):
         self.assertEqual(expected, packing.pack_APDU(cla, ins, p2=p2, data=data))
         expected = bytes.fromhex("0102000000")
         self.assertEqual(expected, packing.pack_APDU(cla, ins))
+
+    def test_iter_chunks(self):
+        message = bytes(range(12))
+        chunks = list(packing.iter_chunks(message, 5))
+        self.assertEqual(
+            [bytes(chunk) for chunk in chunks], [message[:5], message[5:10], message[10:]]
+        )
+        # chunks are views on the message
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        self.assertIs(chunks[0].obj, message)
+        self.assertEqual(list(packing.iter_chunks(b"", 5)), [])
+
+    def test_chunked_APDUs(self):
+        payload = bytes(range(10))
+        apdus = list(packing.chunked_APDUs(1, 2, payload, p1=3, p2=0, p2_next=0x80, max_size=4))
+        self.assertEqual(
+            apdus,
+            [
+                bytes.fromhex("0102030004") + payload[:4],
+                bytes.fromhex("0102038004") + payload[4:8],
+                bytes.fromhex("0102038002") + payload[8:],
+            ],
+        )
+        self.assertTrue(all(isinstance(apdu, bytes) for apdu in apdus))
+
+    def test_chunked_APDUs_length_prefix(self):
+        payload = bytes(range(5))
+        apdus = list(
+            packing.chunked_APDUs(1, 2, payload, p1_next=9, max_size=4, length_prefix_size=2)
+        )
+        self.assertEqual(
+            apdus,
+            [
+                bytes.fromhex("0102000004") + b"\x00\x05" + payload[:2],
+                bytes.fromhex("0102090003") + payload[2:],
+            ],
+        )
+
+    def test_chunked_APDUs_empty_payload(self):
+        self.assertEqual(
+            list(packing.chunked_APDUs(1, 2, b"")), [bytes.fromhex("0102000000")]
+        )
+        self.assertEqual(
+            list(packing.chunked_APDUs(1, 2, b"", length_prefix_size=2)),
+            [bytes.fromhex("0102000002") + b"\x00\x00"],
+        )
+
+    def test_chunked_APDUs_is_lazy(self):
+        apdus = packing.chunked_APDUs(1, 2, bytes(1000), max_size=10)
+        self.assertEqual(next(apdus), bytes.fromhex("010200000a") + bytes(10))
+
+    def test_chunked_APDUs_invalid_size(self):
+        for max_size, prefix in ((0, 0), (0x100, 0), (2, 2)):
+            with self.assertRaises(ValueError):
+                next(
+                    packing.chunked_APDUs(
+                        1, 2, b"x", max_size=max_size, length_prefix_size=prefix
+                    )
+                )
@@ -0,0 +1,118 @@
+import json
+import socket
+from unittest import TestCase
+from unittest.mock import patch
+
+from ragger.utils import ports
+
+from ..helpers import temporary_directory
+
+
+class TestPorts(TestCase):
+    def setUp(self):
+        self._directory = temporary_directory()
+        dir_path = self._directory.__enter__()
+        self.lease_file = dir_path / "ports.json"
+        self._patch = patch.object(ports, "LEASE_FILE", self.lease_file)
+        self._patch.start()
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("", 0))
+            self.free_port = s.getsockname()[1]
+
+    def tearDown(self):
+        ports._POSTPONED_RELEASES.clear()
+        self._patch.stop()
+        self._directory.__exit__(None, None, None)
+
+    def leases(self):
+        return json.loads(self.lease_file.read_text())
+
+    def test_is_port_free(self):
+        self.assertTrue(ports.is_port_free(self.free_port))
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("", self.free_port))
+            s.listen()
+            self.assertFalse(ports.is_port_free(self.free_port))
+
+    def test_reserve_port_skips_leased_ports(self):
+        with patch.object(ports, "is_port_free", return_value=True):
+            first = ports.reserve_port(self.free_port)
+            second = ports.reserve_port(self.free_port)
+        self.assertEqual(first, self.free_port)
+        self.assertEqual(second, self.free_port + 1)
+        self.assertEqual(
+            self.leases(), {str(first): ports.os.getpid(), str(second): ports.os.getpid()}
+        )
+
+    def test_reserve_port_skips_bound_ports(self):
+        with patch.object(
+            ports, "is_port_free", side_effect=lambda port: port != self.free_port
+        ):
+            self.assertEqual(ports.reserve_port(self.free_port), self.free_port + 1)
+
+    def test_reserve_port_none_available(self):
+        with patch.object(ports, "is_port_free", return_value=False):
+            with self.assertRaises(RuntimeError):
+                ports.reserve_port(ports.MAX_PORT - 1)
+
+    def test_release_ports(self):
+        with patch.object(ports, "is_port_free", return_value=True):
+            port = ports.reserve_port(self.free_port)
+            ports.release_ports([port])
+            self.assertEqual(self.leases(), {})
+            self.assertEqual(ports.reserve_port(self.free_port), port)
+
+    def test_release_ports_while_table_locked(self):
+        # As done by a backend collected while the table is locked
+        with patch.object(ports, "is_port_free", return_value=True):
+            port = ports.reserve_port(self.free_port)
+            with ports._lease_table() as leases:
+                ports.release_ports([port])
+                self.assertIn(port, leases)
+        self.assertEqual(self.leases(), {})
+
+    def test_release_ports_of_other_process_ignored(self):
+        self.lease_file.write_text(json.dumps({str(self.free_port): 1}))
+        ports.release_ports([self.free_port])
+        self.assertEqual(self.leases(), {str(self.free_port): 1})
+
+    def test_dead_process_leases_dropped(self):
+        with patch.object(ports, "_is_process_alive", return_value=False):
+            self.lease_file.write_text(json.dumps({str(self.free_port): 123456}))
+            with patch.object(ports, "is_port_free", return_value=True):
+                self.assertEqual(ports.reserve_port(self.free_port), self.free_port)
+
+    def test_lease_file_private(self):
+        with patch.object(ports, "is_port_free", return_value=True):
+            ports.reserve_port(self.free_port)
+        self.assertEqual(self.lease_file.stat().st_mode & 0o777, 0o600)
+
+    def test_lease_file_symlink_not_followed(self):
+        target = self.lease_file.with_name("target.json")
+        self.lease_file.symlink_to(target)
+        with patch.object(ports, "is_port_free", return_value=True):
+            self.assertEqual(ports.reserve_port(self.free_port), self.free_port)
+            ports.release_ports([self.free_port])
+        self.assertFalse(target.exists())
+
+    def test_lease_flag_covers_locking(self):
+        # A release triggered while the lock is being taken or released must not
+        # try to take it again
+        flock = ports.fcntl.flock
+
+        def locking(lease_file, operation):
+            self.assertTrue(ports._LOCKED.held)
+            ports.release_ports([self.free_port])
+            flock(lease_file, operation)
+
+        with patch.object(ports, "is_port_free", return_value=True):
+            port = ports.reserve_port(self.free_port)
+            with patch.object(ports.fcntl, "flock", side_effect=locking):
+                ports.reserve_port(self.free_port)
+        self.assertFalse(ports._LOCKED.held)
+        self.assertNotIn(str(port), self.leases())
+
+    def test_corrupted_lease_file(self):
+        self.lease_file.write_text("not json")
+        with patch.object(ports, "is_port_free", return_value=True):
+            self.assertEqual(ports.reserve_port(self.free_port), self.free_port)
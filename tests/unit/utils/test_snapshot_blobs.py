@@ -0,0 +1,121 @@
+from unittest import TestCase
+
+from ragger.utils.images import SnapshotCache, decode_image
+from ragger.utils.packed_snapshots import SnapshotPack, pack_snapshots
+from ragger.utils.snapshot_blobs import (
+    BLOB_INDEX,
+    BlobIndex,
+    add_blob,
+    blob_digest,
+    expand_snapshots,
+    get_blob_index,
+    golden_file,
+    main,
+    migrate_snapshots,
+    resolve_blob,
+    write_golden,
+)
+from ragger.utils.snapshots import SnapshotManifest
+
+from ..helpers import make_png, temporary_directory
+
+
+class TestSnapshotBlobs(TestCase):
+    def setUp(self):
+        self._directory = temporary_directory()
+        self.dir_path = self._directory.__enter__()
+        self.root = self.dir_path / "snapshots"
+        self.goldens = {
+            "nanos/test_one/00000.png": make_png(),
+            "nanos/test_one/00001.png": make_png((255, 0, 0)),
+            "nanos/test_two/00000.png": make_png(),
+            "nanox/test_one/00000.png": make_png(),
+        }
+        for name, content in self.goldens.items():
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+
+    def tearDown(self):
+        self._directory.__exit__(None, None, None)
+
+    def test_add_blob(self):
+        store = self.dir_path / "store"
+        self.assertEqual(add_blob(store, make_png()), (blob_digest(make_png()), True))
+        self.assertEqual(add_blob(store, make_png()), (blob_digest(make_png()), False))
+        self.assertEqual(len(list(store.iterdir())), 1)
+
+    def test_migrate_and_expand(self):
+        self.assertEqual(migrate_snapshots(self.root), (4, 2))
+        self.assertEqual(len(list((self.root / "blobs").iterdir())), 2)
+        for name, content in self.goldens.items():
+            path = self.root / name
+            self.assertFalse(path.exists())
+            self.assertEqual(resolve_blob(path).read_bytes(), content)
+            self.assertEqual(golden_file(path), resolve_blob(path))
+        self.assertEqual(len(get_blob_index(self.root / "nanos" / "test_one")), 2)
+
+        # Identical goldens share their decoded image
+        cache = SnapshotCache()
+        for name in self.goldens:
+            cache.get(self.root / name)
+        self.assertEqual(len(cache), 2)
+        pixels = decode_image(self.root / "nanos" / "test_one" / "00001.png")
+        self.assertEqual(pixels[0, 0].tolist(), [255, 0, 0])
+
+        # Packs hold the referenced goldens
+        pack = SnapshotPack(pack_snapshots(self.root / "nanos", self.dir_path / "nanos.rgpk"))
+        self.assertEqual(pack.read("test_one/00001.png"), make_png((255, 0, 0)))
+        pack.close()
+
+        self.assertEqual(expand_snapshots(self.root), 4)
+        for name, content in self.goldens.items():
+            self.assertEqual((self.root / name).read_bytes(), content)
+        self.assertFalse((self.root / "blobs").exists())
+        self.assertFalse((self.root / "nanos" / "test_one" / BLOB_INDEX).exists())
+
+    def test_write_golden(self):
+        # Plain files, as long as the tree uses no blob store
+        golden = self.root / "nanos" / "test_three" / "00000.png"
+        golden.parent.mkdir()
+        write_golden(golden, make_png((0, 255, 0)))
+        self.assertEqual(golden.read_bytes(), make_png((0, 255, 0)))
+
+        migrate_snapshots(self.root)
+        store = self.root / "blobs"
+        self.assertEqual(len(list(store.iterdir())), 3)
+        # Existing content: only referenced
+        new_golden = self.root / "nanos" / "test_four" / "00000.png"
+        new_golden.parent.mkdir()
+        write_golden(new_golden, make_png())
+        self.assertFalse(new_golden.exists())
+        self.assertEqual(resolve_blob(new_golden).read_bytes(), make_png())
+        self.assertEqual(len(list(store.iterdir())), 3)
+        # New content: a blob is written, and replaces the golden
+        write_golden(golden, make_png((0, 0, 255)))
+        self.assertEqual(resolve_blob(golden).read_bytes(), make_png((0, 0, 255)))
+        self.assertEqual(len(list(store.iterdir())), 4)
+
+    def test_parallel_updates_merged(self):
+        store = self.root / "blobs"
+        directory = self.root / "nanos" / "test_one"
+        first, second = BlobIndex(directory), BlobIndex(directory)
+        first.update({"00000.png": add_blob(store, make_png())[0]}, store)
+        second.update({"00001.png": add_blob(store, make_png((255, 0, 0)))[0]}, store)
+        index = BlobIndex(directory)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.get("00000.png").read_bytes(), make_png())
+
+    def test_manifest(self):
+        migrate_snapshots(self.root)
+        directory = self.root / "nanos" / "test_one"
+        pixels = decode_image(directory / "00000.png")
+        SnapshotManifest(directory).record("00000.png", pixels)
+        self.assertIsNotNone(SnapshotManifest(directory).digest("00000.png"))
+
+    def test_main(self):
+        main(["migrate", str(self.root)])
+        self.assertTrue((self.root / "blobs").is_dir())
+        main(["expand", str(self.root)])
+        for name, content in self.goldens.items():
+            self.assertEqual((self.root / name).read_bytes(), content)
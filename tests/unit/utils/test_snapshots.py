@@ -0,0 +1,93 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from ragger.utils import Crop
+from ragger.utils.images import crop_image, decode_image, image_digest
+from ragger.utils.snapshots import MANIFEST_NAME, SnapshotManifest, get_manifest
+
+from ..helpers import make_png, temporary_directory
+
+
+class TestSnapshotManifest(TestCase):
+    def setUp(self):
+        self._directory = temporary_directory()
+        self.dir_path = self._directory.__enter__()
+        self.golden = self.dir_path / "00000.png"
+        self.golden.write_bytes(make_png())
+        self.pixels = decode_image(self.golden)
+
+    def tearDown(self):
+        self._directory.__exit__(None, None, None)
+
+    def test_record_and_digest(self):
+        manifest = SnapshotManifest(self.dir_path)
+        self.assertIsNone(manifest.digest(self.golden.name))
+        crop = Crop(lower=2)
+        manifest.record(self.golden.name, self.pixels, crop)
+        self.assertEqual(manifest.digest(self.golden.name), image_digest(self.pixels))
+        self.assertEqual(
+            manifest.digest(self.golden.name, crop),
+            image_digest(crop_image(self.pixels, crop)),
+        )
+        self.assertIsNone(manifest.digest(self.golden.name, Crop(lower=1)))
+        self.assertTrue((self.dir_path / MANIFEST_NAME).is_file())
+        # Reloaded from the file
+        reloaded = SnapshotManifest(self.dir_path)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.digest(self.golden.name), image_digest(self.pixels))
+
+    def test_stale_entries_ignored(self):
+        SnapshotManifest(self.dir_path).record(self.golden.name, self.pixels)
+        # Same content, new modification time (as after a checkout): still valid
+        os.utime(self.golden, ns=(1, 1))
+        manifest = SnapshotManifest(self.dir_path)
+        self.assertEqual(manifest.digest(self.golden.name), image_digest(self.pixels))
+        # Golden rewritten by other means than a golden run
+        self.golden.write_bytes(make_png(color=(255, 0, 0)))
+        self.assertIsNone(manifest.digest(self.golden.name))
+        self.golden.unlink()
+        self.assertIsNone(manifest.digest(self.golden.name))
+
+    def test_recorded_golden_not_read_again(self):
+        recorder = SnapshotManifest(self.dir_path)
+        recorder.record(self.golden.name, self.pixels)
+        # No modification time is stored: it differs from one checkout to another
+        self.assertNotIn("mtime", (self.dir_path / MANIFEST_NAME).read_text())
+        with patch("ragger.utils.snapshots._file_digest") as file_digest:
+            self.assertEqual(recorder.digest(self.golden.name), image_digest(self.pixels))
+        file_digest.assert_not_called()
+        # Another process reads the golden once, then trusts it as well
+        manifest = SnapshotManifest(self.dir_path)
+        self.assertEqual(manifest.digest(self.golden.name), image_digest(self.pixels))
+        with patch("ragger.utils.snapshots._file_digest") as file_digest:
+            self.assertEqual(manifest.digest(self.golden.name), image_digest(self.pixels))
+        file_digest.assert_not_called()
+
+    def test_parallel_records_merged(self):
+        other = self.dir_path / "00001.png"
+        other.write_bytes(make_png(color=(255, 0, 0)))
+        first, second = SnapshotManifest(self.dir_path), SnapshotManifest(self.dir_path)
+        first.record(self.golden.name, self.pixels)
+        second.record(other.name, decode_image(other))
+        self.assertEqual(len(SnapshotManifest(self.dir_path)), 2)
+
+    def test_get_manifest(self):
+        manifest = get_manifest(self.dir_path)
+        self.assertIs(get_manifest(self.dir_path), manifest)
+        self.assertEqual(len(manifest), 0)
+        # Own updates do not trigger a reload
+        manifest.record(self.golden.name, self.pixels)
+        self.assertIs(get_manifest(self.dir_path), manifest)
+        # Updates by another process do
+        other = self.dir_path / "00001.png"
+        other.write_bytes(make_png(color=(255, 0, 0)))
+        SnapshotManifest(self.dir_path).record(other.name, decode_image(other))
+        os.utime(self.dir_path / MANIFEST_NAME, ns=(1, 1))
+        reloaded = get_manifest(self.dir_path)
+        self.assertIsNot(reloaded, manifest)
+        self.assertEqual(len(reloaded), 2)
+        # Goldens verified before the reload are not read again
+        with patch("ragger.utils.snapshots._file_digest") as file_digest:
+            self.assertEqual(reloaded.digest(self.golden.name), image_digest(self.pixels))
+        file_digest.assert_not_called()